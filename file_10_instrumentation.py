@@ -0,0 +1,292 @@
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import functools
+import tracemalloc
+import contextlib
+
+from datetime import datetime
+
+try:
+    import resource # not available on Windows
+except ImportError:
+    resource = None
+
+#%%
+class Instrumentation:
+
+    # Report recorded by the hooked functions of file_2_preprocessing.py (see Instrumentation.activate)
+    active = None
+
+    ## new run report
+    def start_run(name, trace_memory = False, profile = None, profile_dir = None):
+
+        """
+        Creates a run report; stages are recorded with Instrumentation.start_stage/end_stage
+        (or the Instrumentation.stage context manager).
+
+        Parameters:
+        - name: name of the run (e.g. the session folder)
+        - trace_memory: record the peak memory allocated in each stage (tracemalloc; slows pure-Python code)
+        - profile: stage names to run under cProfile, or True for all stages (None: no profiling)
+        - profile_dir: folder for the .prof files of profiled stages (None: statistics in the report only)
+
+        Returns:
+        - dict: run report
+        """
+
+        return {"run": str(name),
+                "started": datetime.now().isoformat(timespec = "seconds"),
+                "trace_memory": trace_memory,
+                "profile": profile if profile in (None, True) else list(profile),
+                "profile_dir": profile_dir,
+                "stages": [],
+                "open": None}
+
+
+    ## cumulative user + system CPU time of this process and its finished child processes
+    def cpu_time():
+
+        times = os.times()
+        return times.user + times.system + times.children_user + times.children_system
+
+
+    ## maximum resident set size of the process so far (in MB)
+    def max_rss_mb():
+
+        if resource is None:
+            return None
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024
+
+
+    def start_stage(report, stage):
+
+        if report is None:
+            return
+
+        # a stage that never ended (e.g. interrupted by an error) is dropped
+        if report["open"] is not None and "profiler" in report["open"]:
+            report["open"]["profiler"].disable()
+
+        record = {"stage": stage}
+
+        if report["trace_memory"]:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            record["traced_start"] = tracemalloc.get_traced_memory()[0]
+
+        if report["profile"] is True or (report["profile"] is not None and stage in report["profile"]):
+            record["profiler"] = cProfile.Profile()
+            record["profiler"].enable()
+
+        record["wall_start"] = time.perf_counter()
+        record["cpu_start"] = Instrumentation.cpu_time()
+
+        report["open"] = record
+
+
+    def end_stage(report, rows = None, error = None):
+
+        """
+        Ends the running stage and records its wall time, CPU time, peak memory and row count.
+
+        Parameters:
+        - report: run report from Instrumentation.start_run (None: nothing is recorded)
+        - rows: number of rows produced by the stage (optional)
+        - error: the exception that stopped the stage (recorded as "error"; None for a completed stage)
+        """
+
+        if report is None:
+            return
+
+        record = report["open"]
+
+        if record is None:
+            raise ValueError("No stage is running.")
+
+        wall = time.perf_counter() - record.pop("wall_start")
+        cpu = Instrumentation.cpu_time() - record.pop("cpu_start")
+
+        entry = {"stage": record["stage"],
+                 "wall [s]": round(wall, 6),
+                 "cpu [s]": round(cpu, 6),
+                 "rows": None if rows is None else int(rows),
+                 "peak memory [MB]": None,
+                 "max RSS [MB]": Instrumentation.max_rss_mb(),
+                 "error": None if error is None else f"{type(error).__name__}: {error}"}
+
+        if "traced_start" in record:
+            entry["peak memory [MB]"] = round((tracemalloc.get_traced_memory()[1] - record["traced_start"]) / 1024 / 1024, 3)
+
+        if "profiler" in record:
+            profiler = record["profiler"]
+            profiler.disable()
+            entry["profile"] = Instrumentation.profile_summary(profiler)
+
+            if report["profile_dir"] is not None:
+                os.makedirs(report["profile_dir"], exist_ok = True)
+                path = os.path.join(report["profile_dir"], f"profile_{record['stage'].replace(' ', '_')}.prof")
+                profiler.dump_stats(path)
+                entry["profile file"] = path
+
+        report["stages"].append(entry)
+        report["open"] = None
+
+
+    ## time one stage in a with-block
+    @contextlib.contextmanager
+    def stage(report, stage):
+
+        """
+        Context manager around Instrumentation.start_stage/end_stage.
+
+        The yielded dict takes the row count: record["rows"] = len(output).
+        A stage that raises is recorded with its error, and the error is raised again.
+        """
+
+        record = {"rows": None}
+        Instrumentation.start_stage(report, stage)
+
+        try:
+            yield record
+        except BaseException as error:
+            if report is not None and report["open"] is not None:
+                Instrumentation.end_stage(report, record["rows"], error)
+            raise
+
+        if report is not None and report["open"] is not None:
+            Instrumentation.end_stage(report, record["rows"])
+
+
+    ## record direct calls of the hooked functions into a report
+    def activate(report):
+
+        """
+        Makes report the active report of Instrumentation.hook (None switches the hooks off).
+        Instrumentation.write_report switches them off again for that report.
+        """
+
+        Instrumentation.active = report
+
+
+    ## record a function as a stage
+    def hook(stage):
+
+        """
+        Decorator for the stage functions of file_2_preprocessing.py.
+
+        While a report is active (Instrumentation.activate) and no other stage is running, each call
+        is recorded as a stage with this name: wall time, CPU time, memory, rows of the result, and
+        cProfile when the name is in the profile option. Calls inside a running stage, e.g. in
+        Pipeline.run_pipeline, are counted by that stage. Without an active report, the function
+        runs unchanged.
+        """
+
+        def decorator(func):
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+
+                report = Instrumentation.active
+
+                if report is None or report["open"] is not None:
+                    return func(*args, **kwargs)
+
+                with Instrumentation.stage(report, stage) as record:
+                    result = func(*args, **kwargs)
+                    record["rows"] = Instrumentation.count_rows(result)
+
+                return result
+
+            return wrapper
+
+        return decorator
+
+
+    ## rows of a stage result: frames and arrays (the first one of a tuple), team tracks, or the frames of a dict of tracks
+    def count_rows(result):
+
+        if isinstance(result, tuple) and result:
+            result = result[0]
+
+        if isinstance(result, dict) and "xy" in result: # tracks (TeamTracks)
+            result = result["xy"]
+
+        if hasattr(result, "shape") and len(result.shape) > 0:
+            return result.shape[0]
+
+        if isinstance(result, dict) and result and all(hasattr(value, "shape") for value in result.values()):
+            return sum(value.shape[0] for value in result.values())
+
+        return None
+
+
+    ## top functions of a profiled stage
+    def profile_summary(profiler, top = 15):
+
+        stats = pstats.Stats(profiler, stream = io.StringIO())
+
+        # sorted by cumulative time
+        summary = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in sorted(stats.stats.items(), key = lambda item: -item[1][3])[:top]:
+            summary.append({"function": f"{os.path.basename(filename)}:{line}({function})",
+                            "calls": calls,
+                            "own [s]": round(own, 6),
+                            "cumulative [s]": round(cumulative, 6)})
+
+        return summary
+
+
+    ## machine-readable report
+    def write_report(report, path):
+
+        """
+        Saves the run report as JSON (stages, totals, settings) and prints a summary table.
+        """
+
+        if report is None:
+            return
+
+        if report["open"] is not None:
+            Instrumentation.end_stage(report)
+
+        output = {key: value for key, value in report.items() if key != "open"}
+        output["total wall [s]"] = round(sum(entry["wall [s]"] for entry in report["stages"]), 6)
+        output["total cpu [s]"] = round(sum(entry["cpu [s]"] for entry in report["stages"]), 6)
+
+        with open(path, "w") as f:
+            json.dump(output, f, indent = 2)
+
+        if Instrumentation.active is report:
+            Instrumentation.active = None
+
+        if report["trace_memory"] and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        Instrumentation.print_report(report)
+        print (f"[OK] Run report saved to {path} \n")
+
+
+    def print_report(report):
+
+        print ("\n" + '-' * 30 + "\n")
+        print ("Stage timings:\n")
+        print (f"{'stage':<24}{'wall [s]':>10}{'cpu [s]':>10}{'rows':>10}{'peak [MB]':>11}")
+
+        for entry in report["stages"]:
+            rows = "" if entry["rows"] is None else entry["rows"]
+            peak = "" if entry["peak memory [MB]"] is None else f"{entry['peak memory [MB]']:.1f}"
+            print (f"{entry['stage']:<24}{entry['wall [s]']:>10.3f}{entry['cpu [s]']:>10.3f}{rows:>10}{peak:>11}")
+
+            if entry.get("error") is not None:
+                print (f"{'':<24}!! Error: {entry['error']}")
+
+        print ()
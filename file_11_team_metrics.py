@@ -0,0 +1,278 @@
+from file_16_team_tracks import TeamTracks
+
+import numpy as np
+import pandas as pd
+
+#%%
+class TeamMetrics:
+
+    ## (frames, players, 2) array of the player columns
+    def positions(team_data):
+
+        """
+        Stacks the player columns of the team data into one array.
+
+        Parameters:
+        - team_data: team positional data ('{playername}_x', '{playername}_y'), e.g. ssg_10Hz,
+                     or tracks from TeamTracks.from_frame (returned without a copy)
+
+        Returns:
+        - xy: np.ndarray (frames, players, 2) with X and Y (NaN for missing players)
+        - players: list of player names, in column order
+        """
+
+        if TeamTracks.is_tracks(team_data):
+            return team_data["xy"], list(team_data["players"])
+
+        players = [c[:-2] for c in team_data.columns if c.endswith("_x") and f"{c[:-2]}_y" in team_data.columns]
+
+        x = team_data[[f"{p}_x" for p in players]].to_numpy(dtype = float)
+        y = team_data[[f"{p}_y" for p in players]].to_numpy(dtype = float)
+
+        return np.stack((x, y), axis = 2), players
+
+
+    ## team labels of the players from the session details
+    def teams_from_session(match_info, players):
+
+        """
+        Maps player names to team labels using the session file.
+
+        The team column is the first column containing 'team'; player names are matched without
+        underscores and case (e.g. 'ID_1' in the session file for the 'ID1_x'/'ID1_y' columns).
+
+        Returns:
+        - dict: player name -> team label (players not found are left out; empty without a team column)
+        """
+
+        team_columns = [c for c in match_info.columns if "team" in c.lower()]
+        name_columns = [c for c in match_info.columns if "name" in c.lower() and "split" not in c.lower()]
+
+        if not team_columns or not name_columns:
+            print ("Friendly reminder: no team or player name column in the session details, all players are treated as one team. \n")
+            return {}
+
+        key = lambda name: str(name).replace("_", "").strip().lower()
+        session_teams = dict(zip(match_info[name_columns[0]].map(key), match_info[team_columns[0]].astype(str).str.strip()))
+
+        return {player: session_teams[key(player)] for player in players if key(player) in session_teams}
+
+
+    ## player indices per team
+    def team_groups(players, teams = None):
+
+        # all players form one team ("Team") by default, as in PositionalData.check_data_loss
+        if teams is None:
+            teams = {}
+
+        labels = [teams.get(player, "Team") for player in players]
+
+        return {team: np.array([i for i, label in enumerate(labels) if label == team]) for team in dict.fromkeys(labels)}
+
+
+    ## centroid of every frame
+    def centroid(xy):
+
+        """
+        NaN-aware mean position of the players in each frame.
+
+        Parameters:
+        - xy: np.ndarray (frames, players, 2)
+
+        Returns:
+        - centroid: np.ndarray (frames, 2), NaN where no player has data
+        - count: np.ndarray (frames,), number of players with data
+        """
+
+        valid = ~np.isnan(xy).any(axis = 2)
+        count = valid.sum(axis = 1)
+
+        total = np.where(valid[:, :, None], xy, 0).sum(axis = 1)
+        centroid = np.divide(total, count[:, None], out = np.full(total.shape, np.nan), where = count[:, None] > 0)
+
+        return centroid, count
+
+
+    ## centroid, stretch index, spread, length and width of one team
+    def team_shape(xy):
+
+        """
+        Team shape measures of every frame, computed on the whole array (no per-frame loop).
+
+        Parameters:
+        - xy: np.ndarray (frames, players, 2) of one team, in rotated pitch coordinates
+              (X along the pitch length, Y along the width)
+
+        Returns:
+        - dict of np.ndarray (frames,):
+          'centroid_x', 'centroid_y': mean position
+          'stretch_index': mean distance of the players to the centroid
+          'spread': root-mean-square distance of the players to the centroid
+          'length', 'width': extent of the team along X and Y (max - min)
+          'players': number of players with data
+        """
+
+        centroid, count = TeamMetrics.centroid(xy)
+        valid = ~np.isnan(xy).any(axis = 2)
+        has_data = count > 0
+
+        distance = np.linalg.norm(xy - centroid[:, None, :], axis = 2)
+        distance = np.where(valid, distance, 0)
+
+        stretch_index = np.divide(distance.sum(axis = 1), count, out = np.full(len(count), np.nan), where = has_data)
+        spread = np.sqrt(np.divide((distance ** 2).sum(axis = 1), count, out = np.full(len(count), np.nan), where = has_data))
+
+        # extent: missing players are excluded by +/- infinity
+        upper = np.where(valid[:, :, None], xy, -np.inf).max(axis = 1)
+        lower = np.where(valid[:, :, None], xy, np.inf).min(axis = 1)
+        extent = np.where(has_data[:, None], upper - lower, np.nan)
+
+        return {"centroid_x": centroid[:, 0],
+                "centroid_y": centroid[:, 1],
+                "stretch_index": stretch_index,
+                "spread": spread,
+                "length": extent[:, 0],
+                "width": extent[:, 1],
+                "players": count}
+
+
+    ## all team measures of a session
+    def team_metrics(team_data, teams = None):
+
+        """
+        Computes the team shape measures of every team and the distances between team centroids.
+
+        Parameters:
+        - team_data: smoothed team positional data ('Timestamp', 'Start [s]', '{playername}_x', '{playername}_y'),
+                     or tracks from TeamTracks.from_frame
+        - teams: dict of player name -> team label (e.g. from TeamMetrics.teams_from_session);
+                 by default the teams of the tracks, or all players in one team ("Team")
+
+        Returns:
+        - pd.DataFrame: 'Timestamp', 'Start [s]', then '{team}_centroid_x', '{team}_centroid_y',
+          '{team}_stretch_index', '{team}_spread', '{team}_length', '{team}_width', '{team}_players'
+          per team, and '{team}_{team}_centroid_distance' per pair of teams
+        """
+
+        xy, players = TeamMetrics.positions(team_data)
+
+        metrics = TeamTracks.time_columns(team_data)
+        centroids = {}
+
+        for team, index in TeamMetrics.team_groups(players, TeamTracks.teams_of(team_data, teams)).items():
+            shape = TeamMetrics.team_shape(xy[:, index])
+
+            for name, values in shape.items():
+                metrics[f"{team}_{name}"] = values
+
+            centroids[team] = np.column_stack((shape["centroid_x"], shape["centroid_y"]))
+
+        # distance between the centroids of every pair of teams
+        labels = list(centroids)
+        for i, team in enumerate(labels):
+            for other in labels[i + 1:]:
+                metrics[f"{team}_{other}_centroid_distance"] = np.linalg.norm(centroids[team] - centroids[other], axis = 1)
+
+        return pd.DataFrame(metrics, index = TeamTracks.frame_index(team_data))
+
+
+    ## convex hull of every frame (monotone chain, vectorised over frames)
+    def convex_hull(xy):
+
+        """
+        Convex hulls of the players of all frames at once (Andrew's monotone chain).
+
+        The chain runs over the players (sorted by X, then Y) and every step is applied to all
+        frames together, so the Python loop is over players rather than frames.
+
+        Parameters:
+        - xy: np.ndarray (frames, players, 2), NaN for missing players
+
+        Returns:
+        - hull: np.ndarray (frames, 2 * players, 2), hull vertices counter-clockwise;
+                the first vertex is repeated at the end (closed ring)
+        - size: np.ndarray (frames,), number of vertices of each ring (0 without players)
+        """
+
+        frames, players = xy.shape[:2]
+        valid = ~np.isnan(xy).any(axis = 2)
+        count = valid.sum(axis = 1)
+
+        # sort the players of each frame by X, then Y; missing players go last
+        order = np.lexsort((np.where(valid, xy[:, :, 1], np.inf), np.where(valid, xy[:, :, 0], np.inf)), axis = 1)
+        points = np.take_along_axis(xy, order[:, :, None], axis = 1)
+
+        hull = np.zeros((frames, 2 * players, 2))
+        size = np.zeros(frames, dtype = np.intp)
+
+        # lower hull over the sorted players, then upper hull back to the first player
+        for upper, chain in ((False, range(players)), (True, range(players - 2, -1, -1))):
+
+            # vertices below this position belong to the finished lower hull
+            start = size.copy() if upper else np.ones(frames, dtype = np.intp)
+
+            for k in chain:
+                index = np.nonzero(k < (count - 1 if upper else count))[0]
+                point = points[index, k]
+
+                # drop the last vertex while it does not make a left turn; only the frames still dropping are checked again
+                frame, p = index, point
+                while len(frame):
+                    s = size[frame]
+                    o, a = hull[frame, s - 2], hull[frame, s - 1]
+                    turn = (a[:, 0] - o[:, 0]) * (p[:, 1] - o[:, 1]) - (a[:, 1] - o[:, 1]) * (p[:, 0] - o[:, 0])
+                    drop = (s > start[frame]) & (turn <= 0)
+                    frame, p = frame[drop], p[drop]
+                    size[frame] -= 1
+
+                hull[index, size[index]] = point
+                size[index] += 1
+
+        return hull, size
+
+
+    ## area and perimeter of the hull rings
+    def hull_area(hull, size):
+
+        # edges between consecutive vertices of each ring
+        edge = np.arange(hull.shape[1] - 1)[None, :] < (size - 1)[:, None]
+
+        # shoelace formula relative to the first vertex (UTM coordinates are large)
+        local = hull - hull[:, :1]
+        a, b = local[:, :-1], local[:, 1:]
+
+        area = 0.5 * np.abs(np.where(edge, a[:, :, 0] * b[:, :, 1] - b[:, :, 0] * a[:, :, 1], 0).sum(axis = 1))
+        perimeter = np.where(edge, np.linalg.norm(b - a, axis = 2), 0).sum(axis = 1)
+
+        return area, perimeter
+
+
+    ## surface area (convex hull) of every team
+    def surface_area(team_data, teams = None, min_players = 3):
+
+        """
+        Team surface area: area and perimeter of the convex hull of each team in every frame.
+
+        Parameters:
+        - team_data: smoothed team positional data ('{playername}_x', '{playername}_y') or tracks (TeamTracks)
+        - teams: dict of player name -> team label, as in TeamMetrics.team_metrics
+        - min_players: frames with fewer players with data are left empty (NaN)
+
+        Returns:
+        - pd.DataFrame with '{team}_surface_area' (m²) and '{team}_perimeter' (m) per team,
+          on the index of team_data (join it to the output of TeamMetrics.team_metrics)
+        """
+
+        xy, players = TeamMetrics.positions(team_data)
+        surface = {}
+
+        for team, index in TeamMetrics.team_groups(players, TeamTracks.teams_of(team_data, teams)).items():
+            team_xy = xy[:, index]
+            hull, size = TeamMetrics.convex_hull(team_xy)
+            area, perimeter = TeamMetrics.hull_area(hull, size)
+
+            enough = (~np.isnan(team_xy).any(axis = 2)).sum(axis = 1) >= max(min_players, 3)
+            surface[f"{team}_surface_area"] = np.where(enough, area, np.nan)
+            surface[f"{team}_perimeter"] = np.where(enough, perimeter, np.nan)
+
+        return pd.DataFrame(surface, index = TeamTracks.frame_index(team_data))
@@ -0,0 +1,195 @@
+from file_11_team_metrics import TeamMetrics
+from file_16_team_tracks import TeamTracks
+
+import numpy as np
+import pandas as pd
+
+#%%
+class PairwiseDistances:
+
+    ## frames per chunk so the temporary arrays stay below memory_mb
+    def chunk_frames(sources, targets, dtype = np.float64, memory_mb = 64):
+
+        # (frames, sources, targets) arrays alive at once: the dx and dy buffers (dx takes the distances),
+        # the missing mask and one temporary of the reduction (at most 8 bytes per pair, e.g. argpartition indices)
+        per_frame = sources * targets * (2 * np.dtype(dtype).itemsize + 1 + 8)
+        return max(1, int(memory_mb * 1024 * 1024 // max(per_frame, 1)))
+
+
+    ## distance matrices of consecutive time chunks
+    def distance_chunks(xy, source = None, target = None, dtype = np.float64, memory_mb = 64, chunk_frames = None):
+
+        """
+        Yields the frame-wise distances between two groups of players, one time chunk at a time,
+        so the (frames, players, players) tensor is never held in memory as a whole.
+
+        Parameters:
+        - xy: np.ndarray (frames, players, 2), e.g. from TeamMetrics.positions
+        - source, target: player indices of the rows and columns (default: all players)
+        - dtype: np.float64 or np.float32; positions are taken relative to their minimum first,
+                 so float32 keeps centimetre precision on UTM coordinates
+        - memory_mb: memory limit of one chunk (sets the chunk length)
+        - chunk_frames: chunk length in frames (overrides memory_mb)
+
+        Yields:
+        - frames: slice of the frames in the chunk
+        - distance: np.ndarray (chunk frames, sources, targets); NaN for missing players and
+                    for a player paired with itself. The array is overwritten by the next chunk
+                    (copy it to keep it).
+        """
+
+        source = np.arange(xy.shape[1]) if source is None else np.asarray(source)
+        target = np.arange(xy.shape[1]) if target is None else np.asarray(target)
+
+        if chunk_frames is None:
+            chunk_frames = PairwiseDistances.chunk_frames(len(source), len(target), dtype, memory_mb)
+
+        # local coordinates (only the differences matter)
+        origin = np.nanmin(xy, axis = (0, 1)) if np.isfinite(xy).any() else np.zeros(2)
+        same = source[:, None] == target[None, :]
+
+        # the buffers are reused by every chunk, so memory use stays fixed
+        chunk_frames = min(chunk_frames, max(len(xy), 1))
+        dx = np.empty((chunk_frames, len(source), len(target)), dtype = dtype)
+        dy = np.empty_like(dx)
+
+        for start in range(0, len(xy), chunk_frames):
+            frames = slice(start, min(start + chunk_frames, len(xy)))
+            local = (xy[frames] - origin).astype(dtype, copy = False)
+            n = len(local)
+
+            np.subtract(local[:, source, 0][:, :, None], local[:, target, 0][:, None, :], out = dx[:n])
+            np.subtract(local[:, source, 1][:, :, None], local[:, target, 1][:, None, :], out = dy[:n])
+            distance = np.hypot(dx[:n], dy[:n], out = dx[:n])
+            distance[:, same] = np.nan
+
+            yield frames, distance
+
+
+    ## reduce the distances of every source player over the targets
+    def reduce_distances(xy, source = None, target = None, reduction = "min", k = 1,
+                         dtype = np.float64, memory_mb = 64, chunk_frames = None):
+
+        """
+        Frame-wise reduction of the distances from each source player to the target players,
+        computed chunk by chunk (memory use depends on memory_mb, not on the session length).
+
+        Parameters:
+        - xy, source, target, dtype, memory_mb, chunk_frames: see PairwiseDistances.distance_chunks
+        - reduction: "min" (nearest target), "mean" (mean distance to the targets with data)
+                     or "knn" (the k nearest targets)
+        - k: number of neighbours for "knn"
+
+        Returns:
+        - "min", "mean": np.ndarray (frames, sources), NaN where no target has data
+        - "knn": distances np.ndarray (frames, sources, k), nearest first, and target player
+                 indices np.ndarray (frames, sources, k) (-1 where there are fewer than k targets)
+        """
+
+        if reduction not in ("min", "mean", "knn"):
+            raise ValueError(f"Unsupported reduction: {reduction} (use 'min', 'mean' or 'knn')")
+
+        source = np.arange(xy.shape[1]) if source is None else np.asarray(source)
+        target = np.arange(xy.shape[1]) if target is None else np.asarray(target)
+        frames = len(xy)
+
+        if reduction == "knn":
+            k = min(k, len(target))
+            result = np.full((frames, len(source), k), np.nan, dtype = dtype)
+            neighbour = np.full((frames, len(source), k), -1, dtype = np.intp)
+        else:
+            result = np.full((frames, len(source)), np.nan, dtype = dtype)
+
+        for chunk, distance in PairwiseDistances.distance_chunks(xy, source, target, dtype, memory_mb, chunk_frames):
+            missing = np.isnan(distance)
+
+            if reduction == "mean":
+                count = (~missing).sum(axis = 2)
+                total = np.where(missing, 0, distance).sum(axis = 2)
+                result[chunk] = np.divide(total, count, out = np.full(total.shape, np.nan, dtype = dtype), where = count > 0)
+                continue
+
+            # missing pairs sort last
+            distance[missing] = np.inf
+
+            if reduction == "min":
+                nearest = distance.min(axis = 2)
+                result[chunk] = np.where(np.isinf(nearest), np.nan, nearest)
+                continue
+
+            # k nearest: partial sort, then order the k candidates
+            candidates = np.argpartition(distance, k - 1, axis = 2)[:, :, :k] if k < len(target) else np.argsort(distance, axis = 2)
+            nearest = np.take_along_axis(distance, candidates, axis = 2)
+            order = np.argsort(nearest, axis = 2)
+            candidates = np.take_along_axis(candidates, order, axis = 2)
+            nearest = np.take_along_axis(nearest, order, axis = 2)
+
+            found = np.isfinite(nearest)
+            result[chunk] = np.where(found, nearest, np.nan)
+            neighbour[chunk] = np.where(found, target[candidates], -1)
+
+        if reduction == "knn":
+            return result, neighbour
+
+        return result
+
+
+    ## distance time series of chosen player pairs (dyads)
+    def pair_distances(xy, pairs, dtype = np.float64):
+
+        """
+        Distances between the given player pairs in every frame, without any distance matrix.
+
+        Parameters:
+        - xy: np.ndarray (frames, players, 2)
+        - pairs: sequence of (player index, player index)
+
+        Returns:
+        - np.ndarray (frames, pairs), NaN where either player has no data
+        """
+
+        pairs = np.asarray(pairs, dtype = np.intp).reshape(-1, 2)
+        difference = xy[:, pairs[:, 0]] - xy[:, pairs[:, 1]]
+
+        return np.hypot(difference[:, :, 0], difference[:, :, 1]).astype(dtype, copy = False)
+
+
+    ## nearest teammate / opponent of every player
+    def player_distances(team_data, teams = None, dtype = np.float64, memory_mb = 64):
+
+        """
+        Distance of every player to the nearest teammate and opponent, and the mean distance
+        to the teammates and opponents, in every frame.
+
+        Parameters:
+        - team_data: smoothed team positional data ('{playername}_x', '{playername}_y') or tracks (TeamTracks)
+        - teams: dict of player name -> team label, as in TeamMetrics.team_metrics
+        - dtype, memory_mb: see PairwiseDistances.distance_chunks
+
+        Returns:
+        - pd.DataFrame on the index of team_data with '{player}_nearest_teammate', '{player}_mean_teammate_distance',
+          and with more than one team '{player}_nearest_opponent', '{player}_mean_opponent_distance'
+        """
+
+        xy, players = TeamMetrics.positions(team_data)
+        groups = TeamMetrics.team_groups(players, TeamTracks.teams_of(team_data, teams))
+        distances = {}
+
+        for team, index in groups.items():
+            opponents = np.concatenate([other for label, other in groups.items() if label != team] or [np.array([], dtype = int)])
+
+            measures = [("nearest_teammate", index, "min"), ("mean_teammate_distance", index, "mean")]
+            if len(opponents):
+                measures += [("nearest_opponent", opponents, "min"), ("mean_opponent_distance", opponents, "mean")]
+
+            for name, target, reduction in measures:
+                values = PairwiseDistances.reduce_distances(xy, index, target, reduction, dtype = dtype, memory_mb = memory_mb)
+                for column, player in enumerate(index):
+                    distances[f"{players[player]}_{name}"] = values[:, column]
+
+        # columns in player order
+        order = [f"{player}_{name}" for player in players
+                 for name in ("nearest_teammate", "mean_teammate_distance", "nearest_opponent", "mean_opponent_distance")
+                 if f"{player}_{name}" in distances]
+
+        return pd.DataFrame({column: distances[column] for column in order}, index = TeamTracks.frame_index(team_data))
@@ -0,0 +1,190 @@
+from file_11_team_metrics import TeamMetrics
+from file_16_team_tracks import TeamTracks
+
+import numpy as np
+
+#%%
+class Heatmaps:
+
+    ## empty heatmap on a grid covering the rotated pitch
+    def new_heatmap(pitch_rotated, cell = 1.0, margin = 0.0):
+
+        """
+        Creates an empty heatmap for the pitch.
+
+        The grid is aligned with the rotated pitch and starts at its corner (minimum X and Y), so
+        heatmaps of different sessions on the same pitch size can be added together even though
+        their map coordinates differ.
+
+        Parameters:
+        - pitch_rotated: rotated pitch vertices (columns 'X', 'Y')
+        - cell: grid cell size in metres
+        - margin: extra space around the pitch lines in metres (e.g. for the run-off area)
+
+        Returns:
+        - dict: 'cell', 'margin', 'shape' (cells along X and Y), 'players' (names), 'teams'
+          (player name -> team label), 'counts' (players, cells X, cells Y) samples per cell,
+          'outside' samples outside the grid per player
+        """
+
+        length = pitch_rotated['X'].max() - pitch_rotated['X'].min()
+        width = pitch_rotated['Y'].max() - pitch_rotated['Y'].min()
+        shape = (int(np.ceil((length + 2 * margin) / cell)), int(np.ceil((width + 2 * margin) / cell)))
+
+        return {"cell": float(cell),
+                "margin": float(margin),
+                "shape": shape,
+                "players": [],
+                "teams": {},
+                "counts": np.zeros((0, *shape), dtype = np.int64),
+                "outside": np.zeros(0, dtype = np.int64)}
+
+
+    ## rows of the given players in the heatmap (new players are appended)
+    def player_rows(heatmap, players):
+
+        new = [player for player in players if player not in heatmap["players"]]
+
+        if new:
+            heatmap["players"] = heatmap["players"] + new
+            heatmap["counts"] = np.concatenate((heatmap["counts"], np.zeros((len(new), *heatmap["shape"]), dtype = np.int64)))
+            heatmap["outside"] = np.concatenate((heatmap["outside"], np.zeros(len(new), dtype = np.int64)))
+
+        return np.array([heatmap["players"].index(player) for player in players], dtype = np.intp)
+
+
+    ## add positions to the heatmap
+    def accumulate(heatmap, team_data, pitch_rotated, teams = None):
+
+        """
+        Bins the positions of all players into the heatmap grid (one np.bincount for all players).
+
+        Can be called once per session, or once per chunk of a streamed session; counts add up.
+
+        Parameters:
+        - heatmap: heatmap from Heatmaps.new_heatmap or Heatmaps.load (updated in place)
+        - team_data: team positional data ('{playername}_x', '{playername}_y'), e.g. ssg_10Hz or a chunk of it,
+                     or tracks (TeamTracks, e.g. a TeamTracks.select view)
+        - pitch_rotated: rotated pitch vertices of this session (positions are binned relative to its corner)
+        - teams: dict of player name -> team label, kept for Heatmaps.team_counts
+
+        Returns:
+        - heatmap
+        """
+
+        xy, players = TeamMetrics.positions(team_data)
+        rows = Heatmaps.player_rows(heatmap, players)
+        heatmap["teams"].update(TeamTracks.teams_of(team_data, teams) or {})
+
+        nx, ny = heatmap["shape"]
+        corner = np.array([pitch_rotated['X'].min(), pitch_rotated['Y'].min()]) - heatmap["margin"]
+
+        # cell of every sample (missing samples are skipped)
+        cell = np.floor((xy - corner) / heatmap["cell"])
+        valid = ~np.isnan(cell).any(axis = 2)
+        inside = valid & (cell[:, :, 0] >= 0) & (cell[:, :, 0] < nx) & (cell[:, :, 1] >= 0) & (cell[:, :, 1] < ny)
+
+        player = np.broadcast_to(rows, inside.shape)[inside]
+        index = (player * nx + cell[:, :, 0][inside].astype(np.intp)) * ny + cell[:, :, 1][inside].astype(np.intp)
+
+        heatmap["counts"] += np.bincount(index, minlength = heatmap["counts"].size).reshape(heatmap["counts"].shape)
+        np.add.at(heatmap["outside"], rows, (valid & ~inside).sum(axis = 0))
+
+        return heatmap
+
+
+    ## add two heatmaps (e.g. saved sessions into a season aggregate)
+    def merge(heatmap, other):
+
+        if heatmap["shape"] != other["shape"] or heatmap["cell"] != other["cell"] or heatmap["margin"] != other["margin"]:
+            raise ValueError(f"Heatmap grids differ: {heatmap['shape']} cells of {heatmap['cell']} m "
+                             f"and {other['shape']} cells of {other['cell']} m")
+
+        rows = Heatmaps.player_rows(heatmap, other["players"])
+        heatmap["counts"][rows] += other["counts"]
+        heatmap["outside"][rows] += other["outside"]
+        heatmap["teams"].update(other["teams"])
+
+        return heatmap
+
+
+    ## counts per team
+    def team_counts(heatmap):
+
+        """
+        Returns:
+        - dict: team label -> np.ndarray (cells X, cells Y), summed over the players of the team
+                (players without a team label count as "Team")
+        """
+
+        labels = [heatmap["teams"].get(player, "Team") for player in heatmap["players"]]
+
+        return {team: heatmap["counts"][[label == team for label in labels]].sum(axis = 0) for team in dict.fromkeys(labels)}
+
+
+    ## save / load the binned arrays
+    def save(heatmap, path):
+
+        np.savez_compressed(path,
+                            counts = heatmap["counts"],
+                            outside = heatmap["outside"],
+                            players = np.array(heatmap["players"], dtype = str),
+                            teams = np.array([heatmap["teams"].get(player, "") for player in heatmap["players"]], dtype = str),
+                            cell = heatmap["cell"],
+                            margin = heatmap["margin"])
+
+        print (f"[OK] Heatmaps of {len(heatmap['players'])} players saved to {path} \n")
+
+
+    def load(path):
+
+        with np.load(path) as data:
+            players = data["players"].tolist()
+            return {"cell": float(data["cell"]),
+                    "margin": float(data["margin"]),
+                    "shape": tuple(int(n) for n in data["counts"].shape[1:]),
+                    "players": players,
+                    "teams": {player: team for player, team in zip(players, data["teams"].tolist()) if team},
+                    "counts": data["counts"].astype(np.int64),
+                    "outside": data["outside"].astype(np.int64)}
+
+
+    ## figure of one heatmap
+    def plot_heatmap(heatmap, name, rate = 10, fig_name = None):
+
+        """
+        Plots the time spent in each cell (seconds, counts / rate) for a player or a team.
+
+        Parameters:
+        - heatmap: heatmap dict
+        - name: player name or team label
+        - rate: sampling rate of the positional data (Hz)
+        - fig_name: title and file name of the figure (saved as '{fig_name}.png')
+
+        Returns:
+        - matplotlib Figure object
+        """
+
+        import matplotlib.pyplot as plt
+
+        if name in heatmap["players"]:
+            counts = heatmap["counts"][heatmap["players"].index(name)]
+        else:
+            counts = Heatmaps.team_counts(heatmap)[name]
+
+        extent = [-heatmap["margin"], heatmap["shape"][0] * heatmap["cell"] - heatmap["margin"],
+                  -heatmap["margin"], heatmap["shape"][1] * heatmap["cell"] - heatmap["margin"]]
+
+        fig, ax = plt.subplots()
+        image = ax.imshow(counts.T / rate, origin = "lower", extent = extent, cmap = "hot", interpolation = "nearest")
+        fig.colorbar(image, ax = ax, label = "Time [s]")
+
+        ax.set_aspect('equal', adjustable = 'box')
+        fig_name = fig_name or f"Heatmap {name}"
+        ax.set_title(fig_name)
+        ax.set_xlabel("X [m]")
+        ax.set_ylabel("Y [m]")
+
+        plt.savefig(f"{fig_name}.png", bbox_inches = "tight")
+
+        return fig
@@ -0,0 +1,119 @@
+from file_2_preprocessing import WorkerPool
+from file_11_team_metrics import TeamMetrics
+
+import numpy as np
+
+#%%
+class DominantRegions:
+
+    # Players at exactly the same position are moved apart by player index * jitter (m),
+    # as the Voronoi diagram is undefined for repeated points
+    jitter = 1e-6
+
+
+    ## Voronoi cell areas of a batch of frames
+    def region_batch(xy, pitch_xy):
+
+        """
+        Areas of the Voronoi cells of all players in a batch of frames, clipped to the pitch.
+
+        All frames of the batch go through Shapely's array functions together
+        (one multipoint per frame, ordered Voronoi cells, one clip for all cells).
+
+        Parameters:
+        - xy: np.ndarray (frames, players, 2), NaN for missing players
+        - pitch_xy: np.ndarray (vertices, 2) of the rotated pitch polygon
+
+        Returns:
+        - np.ndarray float32 (frames, players): area in m² (NaN for missing players)
+        """
+
+        import shapely
+
+        frames, players = xy.shape[:2]
+        areas = np.full((frames, players), np.nan, dtype = np.float32)
+
+        pitch = shapely.polygons(pitch_xy)
+        shapely.prepare(pitch)
+
+        valid = ~np.isnan(xy).any(axis = 2)
+        frame, player = np.nonzero(valid)
+        if not len(frame):
+            return areas
+
+        points = xy[frame, player] + (player * DominantRegions.jitter)[:, None]
+
+        # one multipoint per frame with data; cells come back in the order of the points
+        with_data = np.flatnonzero(valid.any(axis = 1))
+        multipoints = shapely.multipoints(points, indices = np.searchsorted(with_data, frame))
+        cells = shapely.get_parts(shapely.voronoi_polygons(multipoints, extend_to = pitch, ordered = True))
+
+        # a single player has no cell boundary: the whole pitch
+        single = valid.sum(axis = 1)[frame] == 1
+        cells[single] = pitch
+
+        # only cells crossing the pitch lines need clipping
+        area = shapely.area(cells)
+        crossing = ~shapely.contains(pitch, cells)
+        area[crossing] = shapely.area(shapely.intersection(cells[crossing], pitch))
+
+        areas[frame, player] = area
+
+        return areas
+
+
+    ## dominant region of every player
+    def dominant_regions(team_data, pitch_rotated, stride = 1, workers = 1, batch_frames = 2000):
+
+        """
+        Space control: the area of the pitch closer to each player than to any other player
+        (Voronoi cell clipped to the pitch polygon), per player and frame.
+
+        Parameters:
+        - team_data: smoothed team positional data ('{playername}_x', '{playername}_y'), e.g. ssg_10Hz,
+                     or tracks (TeamTracks)
+        - pitch_rotated: rotated pitch vertices (columns 'X', 'Y')
+        - stride: use every stride-th frame (e.g. 10 for one frame per second at 10 Hz)
+        - workers: processes computing batches at the same time
+        - batch_frames: frames per batch
+
+        Returns:
+        - areas: np.ndarray float32 (selected frames, players), area in m² (NaN for missing players)
+        - frames: np.ndarray of the selected row positions in team_data
+        - players: list of player names (columns of areas)
+        """
+
+        xy, players = TeamMetrics.positions(team_data)
+        frames = np.arange(0, len(xy), stride)
+        xy = xy[frames]
+
+        # coordinates relative to the pitch corner keep the geometry precise
+        pitch_xy = pitch_rotated[['X', 'Y']].to_numpy(dtype = float)
+        corner = pitch_xy.min(axis = 0)
+        pitch_xy, xy = pitch_xy - corner, xy - corner
+
+        batches = [xy[start:start + batch_frames] for start in range(0, len(xy), batch_frames)]
+
+        if workers > 1 and len(batches) > 1:
+            with WorkerPool.executor(min(workers, len(batches))) as executor:
+                results = list(executor.map(DominantRegions.region_batch, batches, [pitch_xy] * len(batches)))
+
+        else:
+            results = [DominantRegions.region_batch(batch, pitch_xy) for batch in batches]
+
+        areas = np.concatenate(results) if results else np.zeros((0, len(players)), dtype = np.float32)
+
+        print (f"[OK] Dominant regions of {len(players)} players computed for {len(frames)} frames \n")
+
+        return areas, frames, players
+
+
+    ## space controlled by each team
+    def team_areas(areas, players, teams = None):
+
+        """
+        Returns:
+        - dict: team label -> np.ndarray (frames,), summed cell areas of the team's players
+        """
+
+        return {team: np.nansum(areas[:, index], axis = 1) for team, index in TeamMetrics.team_groups(players, teams).items()}
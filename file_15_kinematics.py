@@ -0,0 +1,170 @@
+from file_11_team_metrics import TeamMetrics
+from file_16_team_tracks import TeamTracks
+
+import numpy as np
+import pandas as pd
+
+#%%
+class Kinematics:
+
+    # Speed zones in m/s (7.2, 14.4, 19.8 and 25.2 km/h), lower bound inclusive
+    speed_zones = {"walking": (0, 2),
+                   "jogging": (2, 4),
+                   "running": (4, 5.5),
+                   "high-speed running": (5.5, 7),
+                   "sprinting": (7, np.inf)}
+
+
+    ## Savitzky-Golay derivative of every column, per run of valid values
+    def savgol_derivative(values, rate, window_length, polyorder, deriv):
+
+        """
+        Savitzky-Golay derivative along axis 0 of a (frames x columns) array with gaps (NaN).
+
+        Gives the same result as scipy.signal.savgol_filter(mode = 'interp') applied to every run
+        of valid values separately, without a Python loop over runs: the interior is one
+        correlation of the whole array (windows touching a gap become NaN), and the first and last
+        window_length // 2 samples of each run are filled from a polynomial fit to the first and
+        last window of the run (the same linear weights for every run). Runs shorter than the
+        window stay NaN.
+        """
+
+        import scipy.signal as signal
+        import scipy.ndimage as ndimage
+
+        half = window_length // 2
+        coeffs = signal.savgol_coeffs(window_length, polyorder, deriv = deriv, delta = 1 / rate, use = 'dot')
+        result = ndimage.correlate1d(values, coeffs, axis = 0, mode = 'constant', cval = np.nan)
+
+        # weights of the edge samples: response of the 'interp' fit to unit impulses
+        edge = signal.savgol_filter(np.eye(window_length), window_length, polyorder, deriv = deriv, delta = 1 / rate, axis = 0, mode = 'interp')
+
+        # start and end of each run of valid values (flat over the columns)
+        valid = np.pad(~np.isnan(values), ((1, 1), (0, 0)))
+        starts, start_cols = np.nonzero(np.diff(valid.astype(np.int8), axis = 0) == 1)
+        ends, end_cols = np.nonzero(np.diff(valid.astype(np.int8), axis = 0) == -1)
+
+        # both lists are sorted by row; order them by column to pair starts with ends
+        start_order, end_order = np.lexsort((starts, start_cols)), np.lexsort((ends, end_cols))
+        starts, ends, cols = starts[start_order], ends[end_order], start_cols[start_order]
+
+        long = ends - starts >= window_length
+        starts, ends, cols = starts[long], ends[long], cols[long]
+
+        window = np.arange(window_length)
+        first = values[starts[:, None] + window, cols[:, None]]
+        last = values[ends[:, None] - window_length + window, cols[:, None]]
+
+        result[starts[:, None] + window[:half], cols[:, None]] = first @ edge[:half].T
+        result[ends[:, None] - half + window[:half], cols[:, None]] = last @ edge[window_length - half:].T
+
+        return result
+
+
+    ## velocity and acceleration vectors of all players
+    def derivatives(xy, rate, window_length = 7, polyorder = 2):
+
+        """
+        First and second Savitzky-Golay derivatives of all player coordinates at once.
+
+        Gaps (NaN) are respected: each run of valid values is differentiated on its own
+        (Kinematics.savgol_derivative); runs shorter than the window stay NaN.
+
+        Parameters:
+        - xy: np.ndarray (frames, players, 2), e.g. from TeamMetrics.positions
+        - rate: sampling rate (Hz)
+        - window_length, polyorder: Savitzky-Golay window (odd number of samples) and polynomial order (at least 2)
+
+        Returns:
+        - velocity: np.ndarray (frames, players, 2) in m/s
+        - acceleration: np.ndarray (frames, players, 2) in m/s²
+        """
+
+        if polyorder < 2:
+            raise ValueError("polyorder must be at least 2 for the acceleration (second derivative).")
+
+        if window_length % 2 == 0 or window_length <= polyorder:
+            raise ValueError("window_length must be odd and larger than polyorder.")
+
+        frames, players = xy.shape[:2]
+        values = xy.reshape(frames, 2 * players)
+
+        velocity = Kinematics.savgol_derivative(values, rate, window_length, polyorder, deriv = 1)
+        acceleration = Kinematics.savgol_derivative(values, rate, window_length, polyorder, deriv = 2)
+
+        return velocity.reshape(frames, players, 2), acceleration.reshape(frames, players, 2)
+
+
+    ## speed, acceleration and distance covered of every player
+    def kinematics(team_data, rate = 10, window_length = 7, polyorder = 2):
+
+        """
+        Speed, acceleration and cumulative distance of every player in every frame.
+
+        Parameters:
+        - team_data: smoothed team positional data ('Timestamp', 'Start [s]', '{playername}_x', '{playername}_y'), e.g. ssg_10Hz,
+                     or tracks (TeamTracks)
+        - rate: sampling rate of team_data (Hz)
+        - window_length, polyorder: see Kinematics.derivatives
+
+        Returns:
+        - pd.DataFrame: 'Timestamp', 'Start [s]', then per player '{playername}_speed' (m/s),
+          '{playername}_acceleration' (m/s², change of speed: positive accelerating, negative decelerating)
+          and '{playername}_distance' (m covered since the start; gaps add no distance)
+        """
+
+        xy, players = TeamMetrics.positions(team_data)
+        velocity, acceleration = Kinematics.derivatives(xy, rate, window_length, polyorder)
+
+        speed = np.hypot(velocity[:, :, 0], velocity[:, :, 1])
+
+        # acceleration along the direction of movement
+        along = (velocity * acceleration).sum(axis = 2)
+        tangential = np.divide(along, speed, out = np.zeros_like(along), where = speed > 1e-6)
+        tangential[np.isnan(speed)] = np.nan
+
+        # distance: steps between consecutive smoothed positions
+        step = np.hypot(*np.moveaxis(np.diff(xy, axis = 0), 2, 0))
+        distance = np.vstack((np.zeros((1, len(players))), np.cumsum(np.nan_to_num(step), axis = 0)))
+
+        columns = TeamTracks.time_columns(team_data)
+        for i, player in enumerate(players):
+            columns[f"{player}_speed"] = speed[:, i]
+            columns[f"{player}_acceleration"] = tangential[:, i]
+            columns[f"{player}_distance"] = distance[:, i]
+
+        return pd.DataFrame(columns, index = TeamTracks.frame_index(team_data))
+
+
+    ## time in each speed zone and total distance per player
+    def zone_summary(kinematics, rate = 10, zones = None):
+
+        """
+        Time spent in each speed zone and total distance covered by every player.
+
+        Parameters:
+        - kinematics: output of Kinematics.kinematics
+        - rate: sampling rate (Hz); every frame counts 1 / rate seconds
+        - zones: dict of zone name -> (lower, upper) speed in m/s (default Kinematics.speed_zones)
+
+        Returns:
+        - pd.DataFrame indexed by player: time per zone in seconds ('{zone} [s]'), 'distance [m]'
+          and 'max speed [m/s]'
+        """
+
+        zones = zones or Kinematics.speed_zones
+
+        players = [c[:-len("_speed")] for c in kinematics.columns if c.endswith("_speed")]
+        speed = kinematics[[f"{player}_speed" for player in players]].to_numpy(dtype = float)
+
+        summary = pd.DataFrame(index = pd.Index(players, name = "player"))
+        for name, (lower, upper) in zones.items():
+            summary[f"{name} [s]"] = ((speed >= lower) & (speed < upper)).sum(axis = 0) / rate
+
+        distance = kinematics[[f"{player}_distance" for player in players]].to_numpy(dtype = float)
+        summary["distance [m]"] = distance[-1] if len(distance) else 0.0
+
+        peak = np.where(np.isnan(speed), -np.inf, speed).max(axis = 0, initial = -np.inf)
+        summary["max speed [m/s]"] = np.where(np.isinf(peak), np.nan, peak)
+
+        return summary
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+#%%
+class TeamTracks:
+
+    # Team tracking data as one contiguous (frames, players, 2) array. A tracks dict holds
+    # 'xy' (float64, X and Y of every player, NaN where missing), 'timestamps' (int64 ms, the
+    # 'Timestamp' column), 'start' (the 'Start [s]' column), 'players' (names) and 'teams'
+    # (one label per player). Players are grouped by team, so every team (and every player,
+    # frame range or single frame) is a view of 'xy' without a copy; 'column_order' keeps the
+    # position of every player in the original wide DataFrame for TeamTracks.to_frame.
+
+    ## wide DataFrame ('{playername}_x', '{playername}_y') -> tracks
+    def from_frame(team_data, teams = None):
+
+        """
+        Parameters:
+        - team_data: team positional data ('Timestamp', 'Start [s]', '{playername}_x', '{playername}_y'), e.g. ssg_10Hz
+        - teams: dict of player name -> team label (players not listed belong to "Team"),
+                 e.g. from TeamMetrics.teams_from_session
+
+        Returns:
+        - tracks dict
+        """
+
+        teams = teams or {}
+        players = [c[:-2] for c in team_data.columns if c.endswith("_x") and f"{c[:-2]}_y" in team_data.columns]
+        labels = [teams.get(player, "Team") for player in players]
+
+        # group the players by team, keeping their order within each team
+        order = sorted(range(len(players)), key = lambda i: list(dict.fromkeys(labels)).index(labels[i]))
+        players = [players[i] for i in order]
+
+        frames = len(team_data)
+        xy = np.empty((frames, len(players), 2), dtype = np.float64)
+        xy[:, :, 0] = team_data[[f"{p}_x" for p in players]].to_numpy(dtype = np.float64)
+        xy[:, :, 1] = team_data[[f"{p}_y" for p in players]].to_numpy(dtype = np.float64)
+
+        timestamps = team_data["Timestamp"].to_numpy(dtype = np.int64) if "Timestamp" in team_data.columns else np.zeros(frames, dtype = np.int64)
+        start = team_data["Start [s]"].to_numpy(dtype = np.float64) if "Start [s]" in team_data.columns else np.full(frames, np.nan)
+
+        return {"xy": xy,
+                "timestamps": timestamps,
+                "start": start,
+                "players": np.array(players, dtype = object),
+                "teams": np.array([labels[i] for i in order], dtype = object),
+                "column_order": np.array(order, dtype = np.intp)}
+
+
+    ## tracks -> wide DataFrame
+    def to_frame(tracks):
+
+        """
+        Returns:
+        - pd.DataFrame: 'Timestamp', 'Start [s]', '{playername}_x', '{playername}_y' in the column order of
+          the DataFrame passed to TeamTracks.from_frame (not grouped by team), as written to team_positions_10Hz.csv;
+          a round trip gives the same table
+        """
+
+        frames, players = tracks["xy"].shape[:2]
+
+        # players back in their original column order (the tracks are grouped by team)
+        order = np.argsort(tracks["column_order"], kind = "stable")
+
+        # (frames, players, 2) -> (frames, 2 * players): x and y columns alternate, as in the wide frame
+        columns = [f"{player}_{axis}" for player in tracks["players"][order] for axis in ("x", "y")]
+        team_data = pd.DataFrame(tracks["xy"][:, order].reshape(frames, 2 * players), columns = columns)
+
+        team_data.insert(0, "Start [s]", tracks["start"])
+        team_data.insert(0, "Timestamp", tracks["timestamps"])
+
+        return team_data
+
+
+    ## views
+    def select(tracks, frames = slice(None), players = slice(None)):
+
+        """
+        Part of the tracks; with slices (as from TeamTracks.time_range, TeamTracks.team_slice or
+        TeamTracks.player_slice) every array is a view of the original, without a copy.
+
+        Returns:
+        - tracks dict
+        """
+
+        return {"xy": tracks["xy"][frames, players],
+                "timestamps": tracks["timestamps"][frames],
+                "start": tracks["start"][frames],
+                "players": tracks["players"][players],
+                "teams": tracks["teams"][players],
+                "column_order": tracks["column_order"][players]}
+
+
+    def player_slice(tracks, player):
+
+        index = list(tracks["players"]).index(player)
+        return slice(index, index + 1)
+
+
+    def team_slice(tracks, team):
+
+        index = np.flatnonzero(tracks["teams"] == team)
+        if not len(index):
+            raise ValueError(f"No players of team {team}")
+
+        return slice(index[0], index[-1] + 1)
+
+
+    def time_range(tracks, start = None, end = None):
+
+        # frames between start and end (seconds since the session started, inclusive)
+        first = 0 if start is None else int(np.searchsorted(tracks["start"], start, side = "left"))
+        last = len(tracks["start"]) if end is None else int(np.searchsorted(tracks["start"], end, side = "right"))
+
+        return slice(first, last)
+
+
+    ## team labels as a dict (player name -> team label), as used by the metric modules
+    def team_labels(tracks):
+
+        return dict(zip(tracks["players"], tracks["teams"]))
+
+
+    ## helpers for stages accepting either a wide DataFrame or tracks
+    def is_tracks(data):
+
+        return isinstance(data, dict) and "xy" in data
+
+
+    def time_columns(data):
+
+        # 'Timestamp' and 'Start [s]' of a wide DataFrame or of tracks
+        if TeamTracks.is_tracks(data):
+            return {"Timestamp": data["timestamps"], "Start [s]": data["start"]}
+
+        return {column: data[column].to_numpy() for column in ("Timestamp", "Start [s]") if column in data.columns}
+
+
+    def frame_index(data):
+
+        return pd.RangeIndex(len(data["xy"])) if TeamTracks.is_tracks(data) else data.index
+
+
+    def teams_of(data, teams = None):
+
+        # teams given explicitly win over the labels carried by tracks
+        if teams is None and TeamTracks.is_tracks(data):
+            return TeamTracks.team_labels(data)
+
+        return teams
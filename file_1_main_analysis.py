@@ -1,13 +1,9 @@
-from file_2_preprocessing import FileDetection
-from file_2_preprocessing import SessionDetails
 from file_2_preprocessing import PitchRotation
-from file_2_preprocessing import PositionalData
-from file_2_preprocessing import Smoothing
 from file_2_preprocessing import VisualInspection
+from file_7_pipeline import Pipeline
 
 import os
 import sys
-import pandas as pd
 
 from pathlib import Path
 
@@ -35,7 +31,7 @@ try:
 except NameError:
     # __file__ is not defined (e.g., run in interactive mode)
     folder_path = Path(sys.argv[0]).resolve().parent
-    
+
 ## if automatically reading folder path does not work
 ## try to insert the folder path below
 ## Example: "\Desktop\..." for Windows
@@ -43,52 +39,24 @@ except NameError:
 
 #folder_path = 'PLEASE COPY/TYPE IN THE PATHNAME OF THE FOLDER CONTAINING ALL FILES'
 
-#%% identify files
-
-## identify files for session info, picth_info, and the folder containing positional data
-filename_session, filename_pitch, foldername_position_data = FileDetection.detect_file_folder_name(folder_path)
+## a folder passed on the command line (e.g. by file_5_batch_analysis.py) is used instead
+## Example: python file_1_main_analysis.py "/Desktop/Session_01"
+if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+    folder_path = Path(sys.argv[1]).resolve()
 
-#%% read session details
+#%% input data
 '''
 
-This section reads the session detials of your interest.
-
-Data exported from different devices/brands may include various types of information.
-
-For the purpose of demonstration, the following columns are of interest,
-
-Date, Category, Format, Team in SSGs, Player Name, Split Start Time, Split End Time
-
-
-An overview provided below:
+Session details: the columns containing Timestamp info (i.e., Split Start Time, Split End Time) are necessary
+for subsetting positional data, while their column names may vary. An overview provided below:
 
 	Date	Category	Format	Number of team 	Player Name	Split Start Time	Split End Time
 0	44519	U-18	6 v 6 	A	ID_1	44519.746692731	44519.747584907
 1	44519	U-18	6 v 6 	A	ID_2	44519.746692731	44519.747584907
 2	44519	U-18	6 v 6 	A	ID_3	44519.746692731	44519.747584907
-3	44519	U-18	6 v 6 	A	ID_4	44519.746692731	44519.747584907
-4	44519	U-18	6 v 6 	A	ID_5	44519.746692731	44519.747584907
-5	44519	U-18	6 v 6 	A	ID_6	44519.746692731	44519.747584907
-
 
-*** Please always keep the columns containing Timestamp info (i.e., Split Start Time, Split End Time) while their column names may vary
-    
-*** This is necessary for subsetting positional data later
-
-'''
 
-## read data with ilepath for session details
-match_info = SessionDetails.read_match_data(folder_path, filename_session)
-
-## parser checking data format
-time_format = SessionDetails.check_time_columns(match_info)
-
-#%% read pitch location
-'''
-
-This section reads the latitude and longitude coordinates of pitch corners
-
-Please ensure your file in the following format
+Pitch location: latitude and longitude coordinates of the four pitch corners
 
     	Longitude	Latitude
 0	-9.12436877	41.72674194
@@ -96,113 +64,115 @@ Please ensure your file in the following format
 2	-9.123290669	41.72612579
 3	-9.12376968	41.72693916
 
-'''
-
-## read pitch data
-pitch = PitchRotation.read_pitch(folder_path, filename_pitch)
-
-## check dataset format
-pitch = PitchRotation.check_pitch_columns(pitch)
-
-#%% map projection
 
-'''
-
-Convert geographic coordinates into cartesian coordinates
+Individual positional data: one file per player, necessary columns including Timestamp, Longtitude, Latitude
 
-Visual inspection option is provided
+    Timestamp	Longitude	Latitude
+44519.71566	-9.123676222	41.7260952
+44519.71566	-9.123676222	41.7260952
 
 '''
 
-## get coordinates(x, y) of pitch
-ini_xyco_pitch = PitchRotation.coordinates_to_field(pitch)
-
-## plot the pitch after map projection
-PitchRotation.plot_pitch(ini_xyco_pitch, fig_name = "Pitch After Map Projection")
-
-#%% rotation matrix calculation
+#%% pipeline options
 
 '''
 
-Make sure pitch length and width align with x-axis and y-axis respectively, for following goal-to-goal or side-to-side analysis.
-
-Rotation matrix computed from rotating pitch will also be used to calibrate player positional data.
+All processing steps run in Pipeline.run_pipeline (file_7_pipeline.py), the same code as the batch runner
+and the command line. Options not set below keep their defaults, see Pipeline.default_options.
 
 '''
 
-origin, the_other, third_vex, fourth_vex = PitchRotation.pitch_pivot(ini_xyco_pitch)
+options = {
+    ## translate pitch and players to the pitch origin (bottom-left corner at (0, 0))?
+    ## False keeps the rotated projection coordinates
+    "translate": False,
 
-## calculate rotation matrix
-rotation_matrix = PitchRotation.rotation_matrix(origin, the_other)
+    ## session window lookup: tolerance (in ticks) and policy ("nearest", "forward", "backward")
+    ## None keeps the defaults, see PositionalData.session_window
+    "window_tolerance": None,
+    "window_policy": None,
 
-## create DataFrame for saving rotated vertices
-pitch_rotated = pd.DataFrame(columns = ['X', 'Y'])
+    ## cache of projected and calibrated player tracks, keyed by raw file, pitch file and session window
+    ## warm reruns (e.g. after changing smoothing options or sec) skip reading, projection and calibration
+    ## set "cache_dir": None to disable
+    "cache_dir": "track_cache",
+    "cache_size_mb": 500, # least recently used tracks are removed above this size
 
-## calibrate pitch coordinates (apply rotation matrix to four vertices)
-for vex in (origin, the_other, third_vex, fourth_vex):
-    
-    pitch_rotated.loc[len(pitch_rotated)] = PitchRotation.rotating_vertex(rotation_matrix, vex.reshape(1, -1))
-    
-print (f"\n Rotated pitch coordinates:\n {pitch_rotated} \n") # get rotated pitch vextices
+    ## streaming mode for multi-hour exports: read files in chunks of this many rows and keep the session window only
+    ## None loads whole files
+    "stream_chunksize": None, # e.g. 100000
 
-## plot rotated pitch
-PitchRotation.plot_pitch(pitch_rotated, fig_name = "Pitch After Rotation") # plot the pitch after rotation
+    ## number of worker processes for reading and processing players in parallel (1 = one after another)
+    ## on macOS and Windows workers start by importing this script again (spawn); the run below is guarded by
+    ## if __name__ == "__main__":, so keep that guard when editing the cells
+    "player_workers": 1, # e.g. os.cpu_count()
 
-#%% process individual positional data
+    ## sampling rate of the new timeline in Hz, e.g. 10, 18 or 25
+    "rate": 10,
 
-'''
+    ## longest gap (in seconds) to fill by interpolation; longer dropouts stay empty (NaN)
+    ## None fills all gaps
+    "max_gap": 1.0,
 
-An example of individual positional data is provided below, necessary columns including Timestamp, Longtitude, Latitude.
+    ## data smoothing, two options:
+    ## "savitzky_golay" (window_length, polyorder) or "butterworth" (low-pass at the sampling rate, order, cutoff in Hz)
+    "smoothing": "savitzky_golay",
+    "window_length": 7,
+    "polyorder": 1,
+    "order": 4,
+    "cutoff": 2,
 
-    Timestamp	Longitude	Latitude
-44519.71566	-9.123676222	41.7260952
-44519.71566	-9.123676222	41.7260952
-
-'''
-
-## path to SSG positional data
-position_data_dir = os.path.join(folder_path, foldername_position_data)
+    ## outputs saved next to the input files (None skips them)
+    "output_csv": "team_positions_10Hz.csv", # team positional data after interpolation and smoothing
+    "heatmaps": "heatmaps.npz",              # samples per 1 m cell for every player, for season aggregates
+    "zones_csv": "speed_zones.csv",          # time in speed zones and distance covered per player
 
-## check data format, necessary columns include 'Timestamp', 'Latitude', 'Longitude'
-check_position_data = PositionalData.check_pitch_columns(position_data_dir) # if necessary columns missing and alternative
+    ## dominant regions (Voronoi cell area of every player, clipped to the pitch) on every n-th frame,
+    ## e.g. 10 for one frame per second at 10 Hz; None skips them
+    "dominant_regions": None,
 
-## number of players in each team
-playernum = len(set([f for f in os.listdir(position_data_dir) if f.endswith('.csv')])) # read csv files only
-print (f"\n {playernum} players in each team during the session")
+    ## wall time, CPU time and row counts of each stage are saved to run_report.json in the folder
+    ## trace_memory = True adds the peak memory of each stage (slower)
+    ## profile = ["process players", "smoothing"] (or True for all) runs stages under cProfile, saved in 'profiles'
+    "trace_memory": False,
+    "profile": None,
+}
 
-## use the rotation matrix used for rotating pitch
-rm = rotation_matrix
+#%% run the pipeline
 
-## timestamps of session start and end
-start_ts, end_ts = PositionalData.identify_start_end_timestamp(match_info, time_format, playernum)
+## files, session details, pitch projection and rotation, player tracks, new timeline, data loss,
+## resampling, smoothing, team metrics, surface area, kinematics, heatmaps, saved outputs and run report
+if __name__ == "__main__":
+    result = Pipeline.run_pipeline(folder_path, options)
 
-## process individual data into team data
-ssg = PositionalData.team_tracking(position_data_dir, check_position_data, time_format, start_ts, end_ts, rm)
+    ## team positional data after interpolation and smoothing
+    ssg_10Hz = result["team_data"]
+    pitch_rotated = result["pitch_rotated"]
+    team_tracks = result["team_tracks"]
 
-## create a 10 Hz dummy timeline starting from 0.1s
-dum_timeline, ssg = PositionalData.create_new_timeline(time_format, ssg, start_ts, end_ts)
+#%% visual inspection: pitch
 
-#%% check data loss
+if __name__ == "__main__":
+    ## plot the pitch after map projection and after rotation
+    PitchRotation.plot_pitch(result["pitch_projected"], fig_name = "Pitch After Map Projection")
+    PitchRotation.plot_pitch(pitch_rotated, fig_name = "Pitch After Rotation")
 
-date_loss = PositionalData.check_data_loss(ssg, dum_timeline)
+    print (f"\n Rotated pitch coordinates:\n {pitch_rotated} \n") # get rotated pitch vextices
 
-#%% merge the positional data with new timeline
+#%% visual inspection: team metrics and kinematics
 
-ssg_10Hz = pd.merge(dum_timeline, ssg, on = "Timestamp", how = "outer")
+if __name__ == "__main__":
+    ## centroid, stretch index, spread, length, width and surface area per team and frame
+    print (f"\n Team metrics:\n {result['team_metrics']} \n")
 
-#%% interpolation
+    print (f"\n Time in speed zones and distance covered:\n {result['speed_zones']} \n")
 
-ssg_10Hz = ssg_10Hz.interpolate(method="linear", limit_direction="both", axis=0)
+    ## space controlled by each team (m²), with the dominant_regions option
+    if result["dominant_regions"] is not None:
+        for team, area in result["dominant_regions"]["team_areas"].items():
+            print (f" Mean dominant region of {team}: {area.mean():.1f} m² \n")
 
-#%% data smoothing, two options provided below
-
-# ## Option 1: Savitzky-Golay filter
-ssg_10Hz = Smoothing.savitzky_golay(playernum, ssg_10Hz)
-
-# ## Option 2: Butterworth low-pass filter
-# ssg_10Hz = Smoothing.butterworth_low_path_filter(playernum, ssg_10Hz, fs = 500, order = 4, cutoff = 10)
-
-#%% visual inspection
+#%% visual inspection: players
 
 """
 
@@ -210,8 +180,12 @@ Plot the pitch and players.
 
 """
 
-## a time point of interest, e.g., 2.5s after the session starts
-sec = 12.5 # TYPE IN THE MOMENT YOU WOULD LIKE TO SEE
+if __name__ == "__main__":
+    ## a time point of interest, e.g., 2.5s after the session starts
+    sec = 12.5 # TYPE IN THE MOMENT YOU WOULD LIKE TO SEE
+
+    ## plot the ocsillation
+    VisualInspection.plot_pitch_players(pitch_rotated, ssg_10Hz, sec)
 
-## plot the ocsillation
-VisualInspection.plot_pitch_players(pitch_rotated, ssg_10Hz, sec)
+    ## export a time range for frame-by-frame review: a folder of PNG frames, a .gif or a .mp4 (needs ffmpeg)
+    # VisualInspection.render_frames(pitch_rotated, ssg_10Hz, os.path.join(folder_path, "frames"), start = 0, end = 60, workers = 4)
@@ -1,12 +1,31 @@
 import os
-import math
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy.signal as signal
 
-from shapely.geometry import LinearRing
-from datetime import datetime, date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from file_3_projection import MapProjection
+from file_10_instrumentation import Instrumentation
+from file_16_team_tracks import TeamTracks
+
+#%%
+class WorkerPool:
+    
+    ## process pool shared by the parallel stages (players, rendering, dominant regions)
+    def executor(workers):
+        
+        """
+        ProcessPoolExecutor with the platform's default start method
+        (fork on Linux; spawn on macOS, where fork is unsafe, and on Windows).
+        
+        With spawn, every worker imports the calling script again, so a script running stages
+        with workers > 1 must keep its top-level code under if __name__ == "__main__":
+        (as file_1_main_analysis.py, file_7_pipeline.py and file_9_benchmark.py do).
+        Functions passed to the pool must be importable, e.g. class functions of these modules.
+        """
+        
+        return ProcessPoolExecutor(max_workers = workers)
+
 
 #%%
 class FileDetection:
@@ -70,6 +89,7 @@ class FileDetection:
 class SessionDetails:
     
     ## Read information: Date, Category, Format, Team in SSGs, Player Name, Split Start Time, Split End Time
+    @Instrumentation.hook("read session")
     def read_match_data(folder_path, filename_session):
         
         '''
@@ -132,7 +152,8 @@ class SessionDetails:
                 report['Start Time'] = "[OK] 'Start Time' column exists. \n"
                 time_format = "datetime-time" # Set format label
                 
-                # df['Start Time'] = pd.to_datetime(df['Start Time'], format="%H:%M:%S.%f").dt.time
+                # Convert to datetime.time assuming format HH:MM:SS.sss (as 'End Time' below)
+                df['Start Time'] = pd.to_datetime(df['Start Time'], format="%H:%M:%S.%f").dt.time
             
             # if it contains float values with more than three digits, assume it's Unix format
             elif all(isinstance(x, float) and len(str(x).split('.')[-1]) > 3 for x in df['Start Time']):
@@ -174,6 +195,7 @@ class SessionDetails:
 #%% 
 class PitchRotation:
     
+    @Instrumentation.hook("read pitch")
     def read_pitch(folder_path, filename_pitch):
         
         # If the pitch file is a CSV file
@@ -264,76 +286,37 @@ class PitchRotation:
         return df
     
     
+    ## UTM zone and hemisphere of the pitch, shared by the pitch and all player tracks
+    def pitch_projection(df):
+        
+        """
+        Selects the UTM zone and hemisphere once from the pitch corners.
+        
+        Every track (and every streamed chunk) is projected with these, so a session close to a
+        zone edge or the equator does not mix coordinates of two zones (as in LiveTracking.pitch_transform).
+        
+        Returns:
+        - zone (int), hemisphere ("N" or "S")
+        """
+        
+        return MapProjection.utm_zone(df['Longitude']), MapProjection.hemisphere(df['Latitude'])
+    
+    
     ## map projection
-    def coordinates_to_field(df): 
-        
-        # Define constants for the WGS84 ellipsoid and UTM projection
-        a = 6378.137 # Semi-major axis of the Earth (in km)
-        e = 0.0818192 # Eccentricity of the Earth's ellipsoid
-        k0 = 0.9996 # Scale factor for UTM
-        E0 = 500 # False Easting (in km) for UTM zone
-        N0 = 0 # False Northing (in km); 0 for northern hemisphere
-        
-        # Lists to store projected X (East) and Y (North) coordinates
-        lon1 = []
-        lat1 = []
-        
-        # Extract latitude and longitude from the DataFrame
-        lons = df['Longitude'].to_list()
-        lats = df['Latitude'].to_list()
-        
-        # Loop through each point and compute projected coordinates
-        for i in range(len(df)):
-            lon = lons[i]
-            lat = lats[i]
-            
-            # Determine UTM zone number based on longitude
-            Zonenum = int(lon / 6) + 31
-            
-            # Calculate the central meridian of the UTM zone in radians
-            lamda0 = (Zonenum - 1) * 6 - 180 + 3
-            lamda0 = lamda0 * math.pi / 180
-            
-            # Convert latitude and longitude to radians
-            phi = lat * math.pi / 180
-            lamda = lon * math.pi / 180
-            
-            # Calculate radius of curvature in the prime vertical
-            v = 1 / math.sqrt(1 - e ** 2 * math.sin(phi) ** 2)
-            
-            # Auxiliary values used in projection
-            A = (lamda - lamda0) * math.cos(phi)
-            T = math.tan(phi) ** 2
-            C = e ** 2 * math.cos(phi) * math.cos(phi) / (1 - e ** 2)
-            
-            # Meridian arc length from the equator to latitude
-            s = (1 - e ** 2 / 4 - 3 * e ** 4 / 64 - 5 * e ** 6 / 256) * phi - \
-                (3 * e ** 2 / 8 + 3 * e ** 4 / 32 + 45 * e ** 6 / 1024) * math.sin(2 * phi) + \
-                (15 * e ** 4 / 256 + 45 * e ** 6 / 1024) * math.sin(4 * phi) - \
-                35 * e ** 6 / 3072 * math.sin(6 * phi)
-            
-            # Calculate Easting (UTME) using UTM projection formula
-            UTME = E0 + k0 * a * v * (A + (1 - T + C)*A ** 3 / 6+(5 - 18 * T + T ** 2) * A ** 5 / 120)
-            
-            # Calculate Northing (UTMN) using UTM projection formula
-            UTMN = N0 + k0 * a * (s + v * math.tan(phi) * (A ** 2 / 2 + (5 - T + 9 * C + 4 * C ** 2) * A ** 4 / 24 + (61 - 58 * T + T ** 2) * A ** 6 / 720))
-            
-            # Convert from kilometers to meters
-            UTME = UTME * 1000
-            UTMN = UTMN * 1000
-            
-            # Append converted coordinates to lists
-            lat1.append(UTME)
-            lon1.append(UTMN)
-            
+    @Instrumentation.hook("pitch projection")
+    def coordinates_to_field(df, zone = None, hemisphere = None): 
+        
+        # Project all pitch corners in one vectorised call (zone and hemisphere from the pitch if not given)
+        xy = MapProjection.to_field_xy(df['Latitude'].to_numpy(), df['Longitude'].to_numpy(), zone, hemisphere)
+        
         # Notify user of successful conversion
         print ("\n" + '-' * 30 + "\n")
         print ("[OK] Pitch coordinates successfully converted to Cartesian coordinates \n")
         
         
         return pd.DataFrame({
-            'X': lon1, 
-            'Y': lat1
+            'X': xy[:, 0], 
+            'Y': xy[:, 1]
             })
     
     
@@ -351,6 +334,10 @@ class PitchRotation:
         - matplotlib Figure object
         """
         
+        # plotting libraries are only loaded when a figure is made
+        import matplotlib.pyplot as plt
+        from shapely.geometry import LinearRing
+        
         # plot for visualisation (explicitly closed polygon)
         ini_pitch_x, ini_pitch_y = LinearRing(zip(df['X'], df['Y'])).xy
         
@@ -475,142 +462,161 @@ class PitchRotation:
         return rotation[0,0], rotation[1,0]
     
     
+    ## Function to calibrate a whole array of points (rotation and optional translation to pitch origin)
+    def calibrate_coordinates (RM, xy, origin = None):
+        
+        """
+        Applies a 2D rotation matrix to all points at once.
+        
+        Parameters:
+        - RM: 2x2 rotation matrix from PitchRotation.rotation_matrix
+        - xy: array-like of shape (N, 2) with X and Y coordinates (NaN rows are kept as NaN)
+        - origin: optional pitch origin (unrotated) from PitchRotation.pitch_pivot;
+                  if given, the rotated origin is moved to (0, 0)
+        
+        Returns:
+        - np.ndarray of shape (N, 2) with calibrated X and Y coordinates
+        """
+        
+        # Row-vector form of np.dot(RM, vertex.T) for all points in one call
+        calibrated = np.asarray(xy, dtype=float) @ np.asarray(RM).T
+        
+        # Translate so that the pitch origin becomes (0, 0)
+        if origin is not None:
+            calibrated -= np.asarray(RM) @ np.asarray(origin, dtype=float).reshape(2)
+        
+        return calibrated
+    
+    
 #%%
 class PositionalData:
     
-    ## parser checking data format
-    def check_pitch_columns(file_dir):
+    ## parser checking column names of one positional data file
+    def check_player_columns(file, columns):
         """
-        Validates GPS data files in a directory for required columns and data formats.
+        Validates the column names of one GPS data file.
         
-        This function scans all CSV files in the specified directory and checks for:
-        1. Presence of required columns: 'Timestamp', 'Longitude', 'Latitude'
-        2. Appropriate data types (float for coordinates, flexible for timestamp)
-        3. Automatically detects alternative column names using keyword matching
-        
-        For each file, it generates a validation report and identifies alternative
-        column names that can be used for automatic renaming in downstream processing.
+        Checks for the required columns 'Timestamp', 'Longitude', 'Latitude' and
+        detects alternative column names using keyword matching. Only the header is
+        needed, so the check runs before the file is parsed.
         
         Parameters:
-        file_dir (str): Path to directory containing GPS data files
+        file (str): File name, used in the printed report
+        columns (list): Column names of the file
         
         Returns:
-        dict: Mapping of standardized column names to detected column names
-               (e.g., {'Timestamp': 'time', 'Longitude': 'Lon', ...})
-        """    
-        # List all files in the given directory
-        file_list = os.listdir(file_dir)
-    
-        # Remove system file '.DS_Store' if present
-        if '.DS_Store' in file_list:
-            file_list.remove('.DS_Store')
+        tuple:
+            report (dict): Status/error message per required column
+            found_columns (dict): Mapping of standardized column names to detected column names
+                                  (e.g., {'Timestamp': 'time', 'Longitude': 'Lon', ...})
+        """
+        # Dictionary to keep track of issues or status for each required column
+        report = {}
+        # Create a dictionary to save the actual column names found in data
+        found_columns = {}
         
-        print("\n" + "=" * 50 + "\n")
-        print ("Following files found in directory:\n")
-        print (*file_list, sep="\n") # check file list
-        print ("\n\n") # blank lines after the list
-        
-        # Loop through each file in the directory to check its contents
-        for file in file_list:
-            print (file + "\n")
-            path = os.path.join(file_dir, file)
-            
-            # Read the file as a CSV (assuming pitch files are CSVs)
-            position = pd.read_csv(path, index_col=False)
+        # Keywords used to look for alternative column names (case-insensitive)
+        keywords = {'Timestamp': 'time', 'Longitude': 'lon', 'Latitude': 'lat'}
+        
+        for column, keyword in keywords.items():
             
-            # Dictionary to keep track of issues or status for each required column
-            report = {}
-            # Create a dictionary to save the actual column names found in data
-            found_columns = {}
+            if column in columns:
+                report[column] = f"[OK] Column '{column}' exists."
+                continue
             
-            print ('Player Coordinates Column Check Results:')
-            print ('-' * 30)
+            # Look for any column that contains the keyword
+            possible_columns = [col for col in columns if keyword in col.strip().lower()]
             
-            # Check if 'Timestamp' column exists
-            if 'Timestamp' not in position.columns:
-                    
-                # Look for any column that contains 'timestamp' (case-insensitive)
-                possible_timestamps = [col for col in position.columns if 'time' in col.strip().lower()]
-                
-                if possible_timestamps: 
-                    # Save the found alternative column name for later renaming
-                    found_columns['Timestamp'] = possible_timestamps[0]
+            if possible_columns:
+                # Save the found alternative column name for later renaming
+                found_columns[column] = possible_columns[0]
                 
-                    print (f"[OK] Friendly reminder: Column '{possible_timestamps[0]}' in {file} will be renamed to 'Timestamp' in further processing. No action needed. Please double check column format in future uses.\n")
-                
-                else:
-                    # No 'Timestamp' or alternative column found — report error
-                    report['Timestamp'] = "Error: Missing column 'Timestamp' and no alternative column found."
-                    
+                print (f"[OK] Friendly reminder: Column '{possible_columns[0]}' in {file} will be renamed to '{column}' in further processing. No action needed. Please double check column format in future uses.\n")
+            
             else:
-                 # 'Timestamp' exists, check data type (float or not)
-                if not pd.api.types.is_float_dtype(position['Timestamp']):
-                    report['Timestamp'] = "[OK] Column 'Timestamp' contains non-float values."
-                else:
-                    report['Timestamp'] = "[OK] Column 'Timestamp' exists and contains float values."
+                # No column or alternative column found — report error
+                report[column] = f"Error: Missing column '{column}' and no alternative column found."
         
+        return report, found_columns
+    
+    
+    
+    ## single-pass ingestion of one positional data file
+    def read_player_file(file_dir, file, time_format, chunksize = None):
+        """
+        Validates and loads one GPS data file, reading it once.
         
+        The header is checked with PositionalData.check_player_columns, alternative column names
+        are normalised to 'Timestamp', 'Latitude', 'Longitude', and only these three columns are
+        parsed (usecols) with explicit dtypes.
         
-            # Check if 'Longitude' column exists
-            if 'Longitude' not in position.columns:
-                
-                # Look for any column that contains 'latitude' (case-insensitive)
-                possible_longitude = [col for col in position.columns if 'lon' in col.strip().lower()]
-                
-                if possible_longitude:
-                
-                    found_columns['Longitude'] = possible_longitude[0]
-                
-                    print (f"[OK] Friendly reminder: Column '{possible_longitude[0]}' in {file} will be renamed to 'Longitude' in further processing. No action needed. Please double check column format in future uses.\n")
-                
-                else:
-                    report['Longitude'] = "Error: Missing column 'Longitude' and no alternative column found."
-                
-            else:
-                # 'Longitude' exists, check if data type is float
-                if not pd.api.types.is_float_dtype(position['Longitude']):
-                    report['Longitude'] = "Error: Column 'Longitude' exists but does not contain float values."
-                else:
-                    report['Longitude'] = "[OK] Column 'Longitude' exists and contains float values."
+        Parameters:
+        file_dir (str): Path to directory containing GPS data files
+        file (str): File name
+        time_format (str): "Unix" (float timestamps) or "datetime-time" (string timestamps)
+        chunksize (int): If given, the file is not loaded but streamed in chunks of this many rows
+                         (bounded memory for multi-hour exports, see PositionalData.stream_window)
         
+        Returns:
+        pd.DataFrame (or iterator of DataFrames if chunksize is given) with columns
+        'Timestamp', 'Latitude', 'Longitude'; None if errors were found (details are printed)
+        """
+        required_columns = ['Timestamp', 'Latitude', 'Longitude']
         
+        # Timestamps are read as floats (Unix) or strings (datetime-time), coordinates as floats
+        dtypes = {'Timestamp': 'float64' if time_format == "Unix" else 'str',
+                  'Latitude': 'float64',
+                  'Longitude': 'float64'}
         
-            # Check if 'Latitude' column exists
-            if 'Latitude' not in position.columns:
-                
-                # Look for any column that contains 'latitude' (case-insensitive)
-                possible_latitude = [col for col in position.columns if 'lat' in col.strip().lower()]
-                
-                if possible_latitude:
-                
-                    found_columns['Latitude'] = possible_latitude[0]
-                
-                    print (f"[OK] Friendly reminder: Column '{possible_latitude[0]}' in {file} will be renamed to 'Latitude' in further processing. No action needed. Please double check column format in future uses.\n")
+        position = None
+        
+        print (file + "\n")
+        path = os.path.join(file_dir, file)
+        
+        print ('Player Coordinates Column Check Results:')
+        print ('-' * 30)
+        
+        # Read the header only and check column names
+        columns = pd.read_csv(path, index_col=False, nrows=0).columns.to_list()
+        report, found_columns = PositionalData.check_player_columns(file, columns)
+        
+        if not any("Error:" in str(v) for v in report.values()):
+            
+            # Actual column names in this file
+            actual_columns = {col: found_columns.get(col, col) for col in required_columns}
+            
+            try:
+                # Parse the three useful columns only
+                reader = pd.read_csv(path, index_col=False, 
+                                     usecols = list(actual_columns.values()), 
+                                     dtype = {actual_columns[col]: dtypes[col] for col in required_columns},
+                                     chunksize = chunksize)
                 
-                else:
-                    report['Latitude'] = "Error: Missing column 'Latitude' and no alternative column found."
+                # Normalise column names and order (lazily for each chunk if streamed)
+                renaming = {value: key for key, value in actual_columns.items()}
                 
-            else:
-                # 'Latitude' exists, check if data type is float
-                if not pd.api.types.is_float_dtype(position['Latitude']):
-                    report['Latitude'] = "Error: Column 'Latitude' exists but does not contain float values."
+                if chunksize is None:
+                    position = reader.rename(columns = renaming)[required_columns]
                 else:
-                    report['Latitude'] = "[OK] Column 'Latitude' exists and contains float values."
-            
-            
-            # Print report for each dataset
-            for column, result in report.items():
-                print(f"{column}: {result}")
-            
-            # Print a summary based on errors found or not
-            if any("Error:" in str(v) for v in report.values()):
-                print(f"\n Error(s) found in {file}. Please see detals above.\n")
-            else:
-                print (f"\n [OK] {file} is ready to go \n")
+                    position = (chunk.rename(columns = renaming)[required_columns] for chunk in reader)
                 
-            print("\n" + "=" * 50 + "\n")
+            except ValueError as error:
+                report['Data Type'] = f"Error: Unexpected data type ({error})."
+        
+        # Print report for each dataset
+        for column, result in report.items():
+            print(f"{column}: {result}")
+        
+        # Print a summary based on errors found or not
+        if any("Error:" in str(v) for v in report.values()):
+            position = None
+            print(f"\n Error(s) found in {file}. Please see detals above.\n")
+        else:
+            print (f"\n [OK] {file} is ready to go \n")
             
-        return found_columns
+        print("\n" + "=" * 50 + "\n")
+        
+        return position
     
     
     
@@ -634,180 +640,390 @@ class PositionalData:
     
     
     
-    def team_tracking(file_dir, check_player, time_format, StartTS, EndTS, RM):
+    def boundary_ticks(StartTS, EndTS):
+        
+        # Session start and end timestamps as integer ticks (see PositionalData.timestamp_ticks)
+        boundaries = pd.Series([StartTS, EndTS])
+        
+        if pd.api.types.is_numeric_dtype(boundaries):
+            boundaries = boundaries.astype(float)
+        
+        return PositionalData.timestamp_ticks(boundaries)
+    
+    
+    
+    def session_window(ticks, StartTS, EndTS, tolerance = None, policy = None):
+        
+        """
+        Finds the first and last rows of the session window with a binary search.
+        
+        Parameters:
+        ticks (np.ndarray): Ascending int64 timestamp ticks of one track (PositionalData.timestamp_ticks)
+        StartTS, EndTS: Session start and end timestamps (float for "Unix", datetime.time for "datetime-time")
+        tolerance (int): Maximum distance (in ticks: sixth decimal for "Unix", microseconds for "datetime-time")
+                         between a boundary and the matched sample. Default: 9 ticks for "Unix", 0 for "datetime-time"
+        policy (str or tuple): "nearest", "forward" (first sample at/after the boundary) or "backward"
+                               (last sample at/before the boundary), for both boundaries or as (start, end).
+                               Default: ("forward", "backward"), i.e. the window never extends beyond the session
+        
+        A track starting after the session start (or ending before the session end) is clipped to its
+        own first (or last) sample, so players joining late or leaving early are kept.
+        
+        Returns:
+        tuple: StartIndex, EndIndex (row positions, inclusive)
+        
+        Raises:
+        ValueError: If no sample is found within the tolerance of a boundary inside the track,
+                    or the track does not overlap the session
+        """
+        
+        # integer ticks of both boundaries
+        targets = PositionalData.boundary_ticks(StartTS, EndTS)
+        
+        if tolerance is None:
+            tolerance = 9 if isinstance(StartTS, (int, float)) else 0
+        
+        if policy is None:
+            policy = ("forward", "backward")
+        elif isinstance(policy, str):
+            policy = (policy, policy)
         
-        # List all files in the given directory
-        file_list = os.listdir(file_dir)
+        if len(ticks) == 0:
+            raise ValueError("No samples found.")
         
-        # Remove system file '.DS_Store' if present
-        if '.DS_Store' in file_list:
-            file_list.remove('.DS_Store')
+        # one vectorised probe for both boundaries
+        after = np.searchsorted(ticks, targets, side = "left") # first sample at/after the boundary
+        before = np.searchsorted(ticks, targets, side = "right") - 1 # last sample at/before the boundary
         
-        # create a DataFrame for later use
-        TeamPosition = pd.DataFrame()
+        matched = []
         
-        # for each player, carry out Column Renaming, Subsetting, Map Projection, Calibration (using rotation matrix)
-        for file in file_list:
-            print (f"merging {file} into team data ... \n")
-            path = os.path.join(file_dir, file)
-            # read useful columns
-            position = pd.read_csv(path, index_col=False)
+        for k, name in enumerate(("Start", "End")):
             
-            required_columns = ['Timestamp', 'Latitude', 'Longitude']
+            if policy[k] not in ("nearest", "forward", "backward"):
+                raise ValueError(f"Unsupported policy: {policy[k]}")
             
-            # rename columns if needed
-            if any(col not in position.columns for col in required_columns):
-                
-                check_player_reversed = {value: key for key, value in check_player.items()}
-                
-                position = position.rename(columns = check_player_reversed)
+            best = None
             
-            # check if all three are included and select columnns if they all exist
-            missing_columns = [col for col in required_columns if col not in position.columns]
+            # prefer the inward direction (forward for start, backward for end) on ties
+            directions = [("forward", after[k]), ("backward", before[k])]
+            if k == 1:
+                directions.reverse()
             
-            if missing_columns:
-                print(f"Error: Still missing columns: {missing_columns} \n")
-                
-            else:
-                position = position[required_columns]
+            for direction, index in directions:
+                if policy[k] in (direction, "nearest") and 0 <= index < len(ticks):
+                    distance = abs(ticks[index] - targets[k])
+                    if distance <= tolerance and (best is None or distance < best[0]):
+                        best = (distance, ticks[index])
             
+            # late start or early end: clip the window to the track
+            if best is None and k == 0 and ticks[0] > targets[0] and ticks[0] <= targets[1]:
+                best = (None, ticks[0])
+            elif best is None and k == 1 and ticks[-1] < targets[1] and ticks[-1] >= targets[0]:
+                best = (None, ticks[-1])
             
-            ## for Unix formatted timestamp
-            if time_format == "Unix":
+            if best is None:
+                raise ValueError(f"{name} timestamp {[StartTS, EndTS][k]} not found within {tolerance} ticks ({policy[k]}).")
             
-                # round to floats with six decimals
-                position['Timestamp'] = position['Timestamp'].round(6)
-                
-                # look for start timestamp
-                # if start timestamp is found
-                if len(position.loc[position['Timestamp'] == StartTS]) >= 1:
-                    # get StartIndex from position data
-                    StartIndex = position.loc[position['Timestamp'] == StartTS].index[0]
-                    print (f"[OK] Start timestamp matched: row {StartIndex} \n")
-                else:
-                    for i in range (1, 10):
-                        # if the data at StartTS is missing, then start from next timestamp
-                        if len(position.loc[(position['Timestamp'] * 1000000).astype(int) == int(StartTS*1000000)+i]) >= 1:
-                            StartIndex = position.loc[(position['Timestamp'] * 1000000).astype(int) == int(StartTS*1000000)+i].index[0]
-                            print (f"[OK] Start timestamp retrieved through further digging: row {StartIndex} \n")
-                            break
-                        else:
-                            print (f"Start timestamp {StartTS+i*0.000001} Not Found in the first searching \n")
-                
-                # look for end timestamp
-                # if end timestamp is found
-                if len(position.loc[position['Timestamp'] == EndTS]) >= 1:
-                    # get EndIndex from position data
-                    EndIndex = position.loc[position['Timestamp'] == EndTS].index[-1]
-                    print (f"[OK] End timestamp matched: row {EndIndex} \n")
-                else: 
-                    for i in range (1, 10):
-                        # if the data at EndTS is missing, then end at last timestamp
-                        if len(position.loc[(position['Timestamp'] * 1000000).astype(int) == int(EndTS*1000000)-i]) >= 1:
-                            EndIndex = position.loc[(position['Timestamp'] * 1000000).astype(int) == int(EndTS*1000000)-i].index[-1]
-                            print (f"[OK] End timestamp retrieved through further digging: row {EndIndex} \n")
-                            break
-                        else:
-                            print (f"End timestamp {EndTS+i*0.000001} Not Found in the first searching \n")
+            matched.append(best[1])
+        
+        # first row of the start tick, last row of the end tick
+        StartIndex = int(np.searchsorted(ticks, matched[0], side = "left"))
+        EndIndex = int(np.searchsorted(ticks, matched[1], side = "right")) - 1
+        
+        if StartIndex > EndIndex:
+            raise ValueError(f"Start timestamp {StartTS} is after end timestamp {EndTS}.")
+        
+        return StartIndex, EndIndex
+    
+    
+    
+    def normalise_timestamps(position, time_format):
+        
+        ## for Unix formatted timestamp
+        if time_format == "Unix":
+        
+            # full precision is kept; the session window lookup works on six decimals (PositionalData.timestamp_ticks)
+            return position
             
+        ## for datetime-time formatted timestamp
+        elif time_format == "datetime-time":
             
-            ## for datetime-time formatted timestamp
-            if time_format == "datetime-time":
-                
-                ## for datetime-time timestamp
-                position['Timestamp'] = pd.to_datetime(position['Timestamp'], format="%H:%M:%S.%f").dt.time
-                
-                # look for start timestamp
-                # if start timestamp is found
-                if len(position.loc[position['Timestamp'] == StartTS]) >= 1:
-                    # get StartIndex from position data
-                    StartIndex = position.loc[position['Timestamp'] == StartTS].index[0]
-                    print (f"[OK] Start timestamp matched: row {StartIndex} \n")
-                else:
-                    print (f"Error: Start timestamp {StartTS} Not Found \n")
-                    
-                # look for end timestamp
-                # if start timestamp is found
-                if len(position.loc[position['Timestamp'] == EndTS]) >= 1:
-                    # get StartIndex from position data
-                    EndIndex = position.loc[position['Timestamp'] == EndTS].index[0]
-                    print (f"[OK] Start timestamp matched: row {EndIndex} \n")
-                else:
-                    print (f"Error: Start timestamp {EndTS} Not Found \n")
+            ## for datetime-time timestamp
+            return position.assign(Timestamp = pd.to_datetime(position['Timestamp'], format="%H:%M:%S.%f").dt.time)
             
+        else:
+            raise ValueError(f"Unsupported time format: {time_format}")
     
-            ## subsetting by StartIndex and EndIndex to select useful data
-            position = position.iloc[StartIndex:EndIndex+1,:]
+    
+    
+    def project_track(position, RM, origin = None, zone = None, hemisphere = None):
+        
+        ## map projection (whole track in one vectorised call, in the zone of the pitch)
+        xy = MapProjection.to_field_xy(position['Latitude'].to_numpy(), position['Longitude'].to_numpy(), zone, hemisphere)
+        
+        ## calibrate player positional data (rotation, and translation if origin is given)
+        xy = PitchRotation.calibrate_coordinates(RM, xy, origin)
+        
+        return position.assign(X = xy[:, 0], Y = xy[:, 1])
+    
+    
+    
+    def stream_window(chunks, time_format, StartTS, EndTS, RM, origin = None, tolerance = None, zone = None, hemisphere = None):
+        
+        """
+        Reads streamed chunks of one player and keeps the rows around the session window.
+        
+        Chunks entirely before the session start are skipped, reading stops at the first chunk
+        starting after the session end (timestamps are assumed to be in ascending order, as exported),
+        and the kept rows are projected and calibrated chunk by chunk. Peak memory therefore
+        scales with the chunk and window size rather than with the file size.
+        
+        Parameters:
+        chunks (iterable): DataFrames from PositionalData.read_player_file(..., chunksize = n)
+        time_format, StartTS, EndTS, RM, origin, tolerance, zone, hemisphere: see PositionalData.player_tracking
+        
+        Returns:
+        pd.DataFrame: Rows within the tolerance of the session window, with columns
+                      'Timestamp', 'Latitude', 'Longitude', 'X', 'Y'
+        """
+        
+        # rows up to the lookup tolerance outside the window are kept for PositionalData.session_window
+        margin = 9 if tolerance is None else tolerance
+        start_tick, end_tick = PositionalData.boundary_ticks(StartTS, EndTS)
+        
+        pieces = []
+        
+        for chunk in chunks:
             
-            ## map projection
-            # Define constants for the WGS84 ellipsoid and UTM projection
-            a = 6378.137
-            e = 0.0818192
-            k0 = 0.9996
-            E0 = 500
-            N0 = 0
-            # Lists to store projected X (East) and Y (North) coordinates
-            lon1 = []
-            lat1 = []
-            lons = position['Longitude'].to_list()
-            lats = position['Latitude'].to_list()
+            chunk = PositionalData.normalise_timestamps(chunk, time_format)
+            ticks = PositionalData.timestamp_ticks(chunk['Timestamp'])
             
-            for k in range(len(position)):
-                lon = lons[k]
-                lat = lats[k]
-                Zonenum = int(lon / 6) + 31
-                lamda0 = (Zonenum - 1) * 6 - 180 + 3
-                lamda0 = lamda0 * math.pi / 180
-                phi = lat * math.pi / 180
-                lamda = lon * math.pi / 180
-                v = 1 / math.sqrt(1 - e ** 2 * math.sin(phi) ** 2)
-                A = (lamda - lamda0) * math.cos(phi)
-                T = math.tan(phi) ** 2
-                C = e ** 2 * math.cos(phi) * math.cos(phi) / (1 - e ** 2)
-                s = (1 - e ** 2 / 4 - 3 * e ** 4 / 64 - 5 * e ** 6 / 256) * phi - \
-                    (3 * e ** 2 / 8 + 3 * e ** 4 / 32 + 45 * e ** 6 / 1024) * math.sin(2 * phi) + \
-                    (15 * e ** 4 / 256 + 45 * e ** 6 / 1024) * math.sin(4 * phi) - \
-                    35 * e ** 6 / 3072 * math.sin(6 * phi)
-                UTME = E0 + k0 * a * v * (A + (1 - T + C)*A ** 3 / 6+(5 - 18 * T + T ** 2) * A ** 5 / 120)
-                UTMN = N0 + k0 * a * (s + v * math.tan(phi) * (A ** 2 / 2 + (5 - T + 9 * C + 4 * C ** 2) * A ** 4 / 24 + (61 - 58 * T + T ** 2) * A ** 6 / 720))
-                
-                ### UTME,UTMN based on kilometer. Convert them into meter
-                UTME = UTME * 1000
-                UTMN = UTMN * 1000
-                lat1.append(UTME)
-                lon1.append(UTMN)
-
-            position["X"] = lon1
-            position["Y"] = lat1
+            if len(ticks) == 0 or ticks.max() < start_tick - margin:
+                continue # chunk before the session
             
-            ## calibrate player positional data
-            for i in range (len(position)):
-                pos = position.iloc[[i], [3,4]].T
-                position.iloc[[i], [3, 4]] = np.dot(RM, pos).T
+            if ticks.min() > end_tick + margin:
+                break # chunk after the session, stop reading
             
-            ## check duplicated timestamps
-            if len(position["Timestamp"].unique()) != len(position):
-                print ("!! Error: Same Timestamp Occurs !! \n")
+            chunk = chunk[(ticks >= start_tick - margin) & (ticks <= end_tick + margin)]
+            pieces.append(PositionalData.project_track(chunk, RM, origin, zone, hemisphere))
+        
+        if not pieces:
+            return pd.DataFrame(columns = ['Timestamp', 'Latitude', 'Longitude', 'X', 'Y'])
+        
+        return pd.concat(pieces, ignore_index = True)
+    
+    
+    
+    def player_tracking(file, position, time_format, StartTS, EndTS, RM, origin = None, tolerance = None, policy = None, zone = None, hemisphere = None):
+        
+        """
+        Subsetting, Map Projection and Calibration (using rotation matrix) of one player.
+        
+        Parameters:
+        file (str): File name, used to extract the player name (e.g. 'U18_ID1.csv' -> 'ID1')
+        position (pd.DataFrame or iterable): Frame (or streamed chunks) from PositionalData.read_player_file
+        time_format (str): "Unix" or "datetime-time"
+        StartTS, EndTS: Session start and end timestamps
+        RM (np.ndarray): 2x2 rotation matrix from PitchRotation.rotation_matrix
+        origin (np.ndarray): Optional pitch origin, see PitchRotation.calibrate_coordinates
+        tolerance, policy: Session window lookup options, see PositionalData.session_window
+        zone, hemisphere: UTM zone and hemisphere from PitchRotation.pitch_projection
+                          (selected from the track itself if None)
+        
+        Returns:
+        pd.DataFrame: Columns 'Timestamp', '{playername}_x', '{playername}_y'
+        """
+        
+        print (f"processing {file} ... \n")
+        
+        if isinstance(position, pd.DataFrame):
+            position = PositionalData.normalise_timestamps(position, time_format)
+        
+        ## streamed chunks: keep rows around the session window only, projected and calibrated as they arrive
+        else:
+            position = PositionalData.stream_window(position, time_format, StartTS, EndTS, RM, origin, tolerance, zone, hemisphere)
+        
+        ## sorted-index lookup requires ascending timestamps
+        ticks = PositionalData.timestamp_ticks(position['Timestamp'])
+        
+        if np.any(np.diff(ticks) < 0):
+            print (f"Friendly reminder: timestamps in {file} are not in ascending order and have been sorted. \n")
+            order = np.argsort(ticks, kind = "stable")
+            position = position.iloc[order].reset_index(drop = True)
+            ticks = ticks[order]
+        
+        ## look for start and end timestamps
+        StartIndex, EndIndex = PositionalData.session_window(ticks, StartTS, EndTS, tolerance, policy)
+        
+        print (f"[OK] Session window matched: rows {StartIndex} to {EndIndex} \n")
+        
+        ## players joining late or leaving early are kept, with NaN outside their own track (see team_tracking)
+        start_tick, end_tick = PositionalData.boundary_ticks(StartTS, EndTS)
+        margin = (9 if isinstance(StartTS, (int, float)) else 0) if tolerance is None else tolerance
+        
+        if ticks[StartIndex] > start_tick + margin:
+            print (f"Friendly reminder: {file} starts after the session start, the track begins at {position['Timestamp'].iloc[StartIndex]}. \n")
+        
+        if ticks[EndIndex] < end_tick - margin:
+            print (f"Friendly reminder: {file} ends before the session end, the track stops at {position['Timestamp'].iloc[EndIndex]}. \n")
+        
+        ## subsetting by StartIndex and EndIndex to select useful data
+        position = position.iloc[StartIndex:EndIndex+1,:]
+        
+        ## map projection and calibration (already done for streamed chunks)
+        if "X" not in position.columns:
+            position = PositionalData.project_track(position, RM, origin, zone, hemisphere)
+        
+        ## check duplicated timestamps
+        if len(position["Timestamp"].unique()) != len(position):
+            print ("!! Error: Same Timestamp Occurs !! \n")
+        
+        ## remove unusedful columns
+        position = position.drop(columns=["Latitude", "Longitude"])
+        
+        ## amend column name
+        # extract player name
+        playername = file.strip().split(".")[0].split("_")[1]
+        position.columns = ["Timestamp", "{}_x".format(playername), "{}_y".format(playername)]
+        
+        return position
+    
+    
+    
+    def player_worker(file_dir, file, time_format, StartTS, EndTS, RM, origin = None, tolerance = None, policy = None, 
+                      zone = None, hemisphere = None, chunksize = None):
+        
+        # Read and process one player; runs in the main process or in a worker process
+        position = PositionalData.read_player_file(file_dir, file, time_format, chunksize)
+        
+        if position is None:
+            raise ValueError(f"Positional data could not be read from: {file}")
+        
+        return PositionalData.player_tracking(file, position, time_format, StartTS, EndTS, RM, origin, tolerance, policy, zone, hemisphere)
+    
+    
+    
+    @Instrumentation.hook("process players")
+    def process_players(file_dir, files, time_format, StartTS, EndTS, RM, origin = None, tolerance = None, policy = None, 
+                        zone = None, hemisphere = None, chunksize = None, workers = 1):
+        
+        """
+        Reads and processes player files (PositionalData.player_tracking), optionally in parallel.
+        
+        Players are independent until team_tracking, so with workers > 1 each file is read,
+        subset, projected and calibrated in a separate process (ProcessPoolExecutor).
+        The serial and parallel modes run the same code and return the same tracks.
+        
+        Parameters:
+        file_dir (str): Path to directory containing GPS data files
+        files (list): Files to be processed
+        time_format, StartTS, EndTS, RM, origin, tolerance, policy, zone, hemisphere: see PositionalData.player_tracking
+        chunksize (int): Optional streaming chunk size, see PositionalData.read_player_file
+        workers (int): Number of worker processes; 1 processes all files in the current process
+        
+        Returns:
+        dict: Mapping of file name to track, in the order of files
+        
+        Raises:
+        ValueError: If any file could not be read or processed (after all files have been tried)
+        """
+        
+        options = (time_format, StartTS, EndTS, RM, origin, tolerance, policy, zone, hemisphere, chunksize)
+        
+        tracks = {}
+        failed_files = {}
+        
+        if workers > 1 and len(files) > 1:
             
-            ## remove unusedful columns
-            position.drop(columns=["Latitude", "Longitude"], inplace = True)
+            with WorkerPool.executor(min(workers, len(files))) as executor:
+                
+                futures = {file: executor.submit(PositionalData.player_worker, file_dir, file, *options) for file in files}
+                
+                for file, future in futures.items():
+                    try:
+                        tracks[file] = future.result()
+                    except ValueError as error:
+                        failed_files[file] = str(error)
+        
+        else:
+            for file in files:
+                try:
+                    tracks[file] = PositionalData.player_worker(file_dir, file, *options)
+                except ValueError as error:
+                    failed_files[file] = str(error)
+        
+        if failed_files:
+            raise ValueError(f"Positional data could not be processed: {failed_files}")
+        
+        return tracks
+    
+    
+    
+    def timestamp_ticks(timestamps):
+        
+        """
+        Converts timestamps into integer ticks for exact alignment.
+        
+        Unix formatted (float) timestamps become integers of the sixth decimal (rounded, as in the
+        session details); datetime-time timestamps become microseconds since midnight.
+        
+        Parameters:
+        timestamps (pd.Series): Timestamps of one track
+        
+        Returns:
+        np.ndarray: int64 ticks
+        """
+        
+        if pd.api.types.is_float_dtype(timestamps):
+            return np.round(timestamps.to_numpy() * 1000000).astype(np.int64)
+        
+        return np.array([((t.hour * 60 + t.minute) * 60 + t.second) * 1000000 + t.microsecond for t in timestamps], dtype = np.int64)
+    
+    
+    
+    @Instrumentation.hook("team tracking")
+    def team_tracking(tracks):
+        
+        """
+        Aligns processed player tracks into team positional data in one pass.
+        
+        All tracks are placed on the union of their timestamps (equivalent to a full outer join
+        on Timestamp; exact float values for "Unix", integer ticks for "datetime-time"), so players joining or leaving partway through
+        are kept with NaN outside their own track. Duplicated timestamps within a track
+        (reported by PositionalData.player_tracking) keep the last sample.
+        
+        Parameters:
+        tracks (dict): Mapping of file name to track from PositionalData.player_tracking
+        
+        Returns:
+        pd.DataFrame: Columns 'Timestamp', then '{playername}_x', '{playername}_y' per player,
+                      rows sorted by ascending timestamps
+        """
+        
+        ## alignment keys of every track
+        ticks = [track['Timestamp'].to_numpy(dtype = float) if pd.api.types.is_float_dtype(track['Timestamp'])
+                 else PositionalData.timestamp_ticks(track['Timestamp']) for track in tracks.values()]
+        
+        ## common timeline: sorted union of all keys (keep the original timestamp of each key)
+        timeline, first_index = np.unique(np.concatenate(ticks), return_index = True)
+        timestamps = pd.concat([track['Timestamp'] for track in tracks.values()], ignore_index = True).iloc[first_index]
+        
+        ## team block, NaN where a player has no sample
+        team_xy = np.full((len(timeline), 2 * len(tracks)), np.nan)
+        columns = []
+        
+        for player_index, (file, track) in enumerate(tracks.items()):
             
-            ## amend column name
-            # extract player name
-            playername = file.strip().split(".")[0].split("_")[1]
-            position.columns = ["Timestamp", "{}_x".format(playername), "{}_y".format(playername)]
+            # rows of this player's samples on the common timeline
+            rows = np.searchsorted(timeline, ticks[player_index])
+            team_xy[rows, 2 * player_index:2 * player_index + 2] = track.iloc[:, 1:3].to_numpy(dtype = float)
             
-            ## integrate into team positional dataset (full outer join)
-            if file_list.index(file) == 0:
-                TeamPosition = position
-            else:
-                TeamPosition = pd.merge(TeamPosition, position, on = 'Timestamp', how = 'outer')
-                
-            print (f"Data from {playername} successfully merged into team data \n")
-            print ("\n" + "=" * 50 + "\n")
+            columns += list(track.columns[1:3])
             
-        ## sort rows by ascending timestamps
-        TeamPosition = TeamPosition.sort_values(by = 'Timestamp', axis=0, ascending = True).reset_index(drop = True)
+            print (f"Data from {file} successfully aligned into team data \n")
+        
+        TeamPosition = pd.DataFrame(team_xy, columns = columns)
+        TeamPosition.insert(0, 'Timestamp', timestamps.to_numpy())
         
         print ("Team data successfully merged \n")
         print (TeamPosition)
@@ -816,187 +1032,410 @@ class PositionalData:
     
     
     
-    def create_new_timeline (time_format, ssg, start_ts, end_ts):
+    @Instrumentation.hook("new timeline")
+    def create_new_timeline (time_format, ssg, start_ts, end_ts, rate = 10):
         
         """
-        Creates a standardized 10Hz timeline and processes timestamp data based on the specified format.
-        
-        This function handles two timestamp formats:
-        1. Unix timestamps (seconds since epoch)
-        2. datetime.time objects (time-of-day without date)
+        Creates a uniform timeline at the requested sampling rate and converts the data timestamps.
         
-        It returns a uniform 10Hz timeline and processes the input data to match this timeline format.
+        All timestamps are converted once into int64 milliseconds (see Resampling.to_milliseconds),
+        so the size of the timeline depends on the session duration and rate only.
         
         Parameters:
         time_format (str): Specifies timestamp format - "Unix" or "datetime-time"
         ssg (pd.DataFrame): Input data containing timestamp column
         start_ts (float/datetime.time): Start time boundary
         end_ts (float/datetime.time): End time boundary
+        rate (float): Sampling rate of the timeline in Hz (e.g. 10, 18, 25)
         
         Returns:
         tuple: 
-            dum_timeline (pd.DataFrame): Uniform 10Hz timeline with columns:
-                - Timestamp: Original time representation
-                - Start [s]: Time in seconds from start (0.0, 0.1, 0.2,...)
-            ssg (pd.DataFrame): Processed input data with converted timestamps
+            dum_timeline (pd.DataFrame): Uniform timeline with columns:
+                - Timestamp: int64 milliseconds
+                - Start [s]: Time in seconds from start (0.0, 0.1, 0.2,... at 10 Hz)
+            ssg (pd.DataFrame): Input data with Timestamp converted to int64 milliseconds
         
         Raises:
         ValueError: For unsupported time formats
         """
-        ## for Unix formatted timestamp
-        if time_format == "Unix":
-            
-            ## convert Timestamp into int
-            ssg["Timestamp"] = ssg["Timestamp"].map(lambda x: x*1000000).astype(int) # to be merged with the dummy timeline
-            
-            ## create a 10 Hz dummy timeline starting from 0.1s
-            dum_timeline = pd.DataFrame({"Timestamp": list(range(int(start_ts*1000000), int(end_ts*1000000)+1, 1))})
-            
-            ## finalise team dataset
-            dum_timeline["Start [s]"] = dum_timeline.index * 0.1
-            
-        ## for datetime-time timestamp
-        elif time_format == "datetime-time":
-            
-            ## combine with dummy date
-            start = datetime.combine(date.today(), start_ts)
-            end = datetime.combine(date.today(), end_ts)
-            
-            ## each sample: 10 Hz leads to each step of 0.1 sec
-            step = timedelta(seconds=0.1)
-            
-            ## create a 10 Hz dummy timeline starting from 0.1s
-            dum_timeline = pd.DataFrame({"Timestamp": [(start + i * step).time() for i in range(int((end - start) / step) + 1)]})
-            
-            # finalise team dataset
-            dum_timeline["Start [s]"] = dum_timeline.index * 0.1
-            
-        else:
-            raise ValueError(f"Unsupported time format: {time_format}")
+        ## session boundaries in milliseconds
+        start_ms, end_ms = Resampling.to_milliseconds(pd.Series([start_ts, end_ts]), time_format)
+        
+        ## convert Timestamp into int64 milliseconds
+        ssg = ssg.assign(Timestamp = Resampling.to_milliseconds(ssg["Timestamp"], time_format))
+        
+        ## create the dummy timeline starting from 0 s
+        dum_timeline = Resampling.target_grid(start_ms, end_ms, rate)
         
         return dum_timeline, ssg
     
     
     
-    def check_data_loss (ssg, dum_timeline):
+    @Instrumentation.hook("data loss")
+    def check_data_loss (ssg, dum_timeline, teams = None):
         
         """
-        Analyzes data completeness and missing value patterns in synchronized sensor data.
+        Analyzes data completeness and missing value patterns on the uniform timeline.
     
-        This function evaluates three types of data loss:
-        1. Partial data loss: Timestamps with missing values for at least one player
-        2. Complete data loss: Expected timestamps missing entirely from the dataset
-        3. Consecutive NaNs: Runs of missing values per player (2-6 consecutive missing entries)
+        Every player sample is assigned to the nearest timeline slot (within half a step), which
+        gives one 2-D boolean array (slots x players) of missing data. Run lengths of missing data
+        are computed for all players at once on this array.
     
         Parameters:
         -----------
         ssg : pandas.DataFrame
-            Sensor data DataFrame where:
-            - Index/Row: Timestamps
-            - Column 0: Should be timestamp (ignored for player analysis)
-            - Columns 1,3,5...: Player IDs
-            - Columns 2,4,6...: Corresponding player values
-            Expects NaN values indicating missing measurements.
-    
-        dum_timeline : pandas.Series or array-like
-            Complete reference timeline of all expected timestamps. Used to identify
-            completely missing data points.
-    
-        Behavior:
-        ---------
-        Prints formatted analysis report with:
-        - Partial data loss counts/percentages
-        - Complete data loss counts/percentages
-        - Distribution of consecutive NaN runs (2-6 length) per player column
-    
-        Note:
-        -----
-        Player columns are identified as every odd-indexed column (1,3,5...) in `ssg`.
+            Team data from PositionalData.create_new_timeline ('Timestamp' in milliseconds,
+            then '{playername}_x', '{playername}_y' per player). A player sample counts as
+            missing if x or y is NaN.
+    
+        dum_timeline : pandas.DataFrame
+            Uniform timeline from PositionalData.create_new_timeline.
+        
+        teams : dict, optional
+            Mapping of player name to team label; all players form one team ("Team") by default.
+    
+        Returns:
+        --------
+        dict with
+        - 'expected_samples': number of timeline slots
+        - 'partial_loss': {'N', 'Percent'}, slots with missing data for some (not all) players
+        - 'complete_loss': {'N', 'Percent'}, slots with missing data for all players
+        - 'players': pd.DataFrame per player (team, samples, missing, coverage [%], runs, largest gap)
+        - 'teams': pd.DataFrame per team (players, coverage [%], runs, largest gap)
+        - 'run_lengths': pd.DataFrame, full run-length histogram (player, team, run length, count)
+        
+        Use PositionalData.print_data_loss for a console summary.
         """
-        ## the number of rows with NaN value (partial data loss)
-        print("-" * 50)
-        print("Partial data loss (missing data for some players)")
+        ## player names from column names
+        players = [c[:-2] for c in ssg.columns if c.endswith("_x") and f"{c[:-2]}_y" in ssg.columns]
+        
+        if teams is None:
+            teams = {}
+        player_teams = [teams.get(player, "Team") for player in players]
+        
+        grid = dum_timeline["Timestamp"].to_numpy(dtype = np.int64)
+        step = float(np.median(np.diff(grid))) if len(grid) > 1 else 1.0
         
-        # Find rows where any player data is missing (NaN) - partial data loss
-        partial_loss_rows = ssg[ssg.isnull().any(axis=1)]
-        partial_loss_count = len(partial_loss_rows)
+        ## valid samples (x and y present) of all players
+        t = ssg["Timestamp"].to_numpy(dtype = np.int64)
+        valid = ssg[[f"{p}_x" for p in players]].notna().to_numpy() & ssg[[f"{p}_y" for p in players]].notna().to_numpy()
         
-        # Total expected rows based on timeline
-        total_expected = len(dum_timeline)
+        ## nearest timeline slot of every sample
+        if len(grid):
+            slot = np.clip(np.searchsorted(grid, t), 1, max(len(grid) - 1, 1))
+            slot = np.where(np.abs(grid[slot - 1] - t) <= np.abs(grid[np.minimum(slot, len(grid) - 1)] - t), slot - 1, slot)
+            on_grid = np.abs(grid[slot] - t) <= step / 2
+        else:
+            # empty timeline (e.g. session end before start): no slot is expected, the report is all zeros
+            slot = np.zeros(len(t), dtype = np.intp)
+            on_grid = np.zeros(len(t), dtype = bool)
+        
+        rows, cols = np.nonzero(valid & on_grid[:, None])
+        observed = np.zeros((len(grid), len(players)), dtype = bool)
+        observed[slot[rows], cols] = True
+        missing = ~observed
+        
+        ## run-length encoding of missing data for all players at once
+        edges = np.diff(np.pad(missing, ((1, 1), (0, 0))).astype(np.int8).T, axis = 1) # players x (slots + 1)
+        run_player, run_start = np.nonzero(edges == 1)
+        _, run_end = np.nonzero(edges == -1)
+        run_length = run_end - run_start
+        
+        ## full run-length histogram per player
+        histogram = pd.DataFrame({"player": np.array(players, dtype = object)[run_player],
+                                  "team": np.array(player_teams, dtype = object)[run_player],
+                                  "run length": run_length})
+        histogram = histogram.groupby(["player", "team", "run length"], sort = True).size().rename("count").reset_index()
+        
+        largest_gap = np.zeros(len(players), dtype = np.int64)
+        np.maximum.at(largest_gap, run_player, run_length)
+        
+        expected = len(grid)
+        n_missing = missing.sum(axis = 0)
+        
+        player_report = pd.DataFrame({"team": player_teams,
+                                      "samples": expected - n_missing,
+                                      "missing": n_missing,
+                                      "coverage [%]": 100 * (expected - n_missing) / max(expected, 1),
+                                      "runs": np.bincount(run_player, minlength = len(players)),
+                                      "largest gap": largest_gap,
+                                      "largest gap [s]": largest_gap * step / 1000},
+                                     index = pd.Index(players, name = "player"))
+        
+        team_report = player_report.groupby("team").agg(**{"players": ("samples", "size"),
+                                                           "coverage [%]": ("coverage [%]", "mean"),
+                                                           "runs": ("runs", "sum"),
+                                                           "largest gap": ("largest gap", "max"),
+                                                           "largest gap [s]": ("largest gap [s]", "max")})
+        
+        ## partial and complete data loss per slot
+        n_missing_players = missing.sum(axis = 1)
+        partial = int(((n_missing_players > 0) & (n_missing_players < len(players))).sum())
+        complete = int((n_missing_players == len(players)).sum())
+        
+        return {"expected_samples": expected,
+                "partial_loss": {"N": partial, "Percent": 100 * partial / max(expected, 1)},
+                "complete_loss": {"N": complete, "Percent": 100 * complete / max(expected, 1)},
+                "players": player_report,
+                "teams": team_report,
+                "run_lengths": histogram}
+    
+    
+    
+    def print_data_loss (report):
         
-        # Print count and percentage of partial data loss
-        print(f"N = {partial_loss_count}")
-        print(f"Percent: {partial_loss_count / total_expected:.2%}")
+        ## the number of slots with missing data for some players (partial data loss)
+        print("-" * 50)
+        print("Partial data loss (missing data for some players)")
+        print(f"N = {report['partial_loss']['N']}")
+        print(f"Percent: {report['partial_loss']['Percent']:.2f}%")
         print("=" * 50)
         
-        ## the number of missing timestamps (complete data loss)
+        ## the number of slots with missing data for all players (complete data loss)
         print("-" * 50)
         print("Complete data loss (missing data for all players)")
+        print(f"N = {report['complete_loss']['N']}")
+        print(f"Percent: {report['complete_loss']['Percent']:.2f}%")
+        print("=" * 50)
         
-        # Calculate complete loss as missing rows entirely from ssg compared to expected timeline
-        complete_loss_count = len(dum_timeline) - len(ssg)
+        print("-" * 50)
+        print("Coverage and largest gap per player")
+        print(report["players"].to_string(float_format = "{:.2f}".format))
+        print("=" * 50)
         
-        # Print count and percentage of complete data loss
-        print(f"N = {complete_loss_count}")
-        print(f"Percent: {complete_loss_count / total_expected:.2%}")
+        print("-" * 50)
+        print("Consecutive missing samples (run length: count)")
+        for player, runs in report["run_lengths"].groupby("player"):
+            print(f"{player}: " + ", ".join(f"{length}: {count}" for length, count in zip(runs["run length"], runs["count"])))
         print("=" * 50)
+
+
+#%%
+
+class Resampling:
+    
+    def to_milliseconds(timestamps, time_format):
         
+        """
+        Converts timestamps into int64 milliseconds.
         
-        print("-" * 50)
-        print("Consecutive NaNs per player")
+        "Unix" formatted (float) timestamps are interpreted by magnitude: serial days
+        (e.g. 44519.7466, as exported by Catapult/Excel), seconds or milliseconds since epoch.
+        "datetime-time" timestamps become milliseconds since midnight.
         
-        # Select columns corresponding to player data; assuming every 2nd column starting from index 1 is player ID data
-        player_columns = ssg.columns[1::2]
+        Parameters:
+        timestamps (pd.Series): Timestamps in the original representation
+        time_format (str): "Unix" or "datetime-time"
         
-        # Set max run length to count
-        max_consecutive = 6
+        Returns:
+        np.ndarray: int64 milliseconds
+        """
         
-        # Initialize counts
-        consecutive_counts = {n: 0 for n in range(2, max_consecutive + 1)}
+        if time_format == "Unix":
+            
+            values = timestamps.to_numpy(dtype = float)
+            magnitude = np.nanmax(np.abs(values)) if len(values) else 0
+            
+            if magnitude < 1e6: # serial days
+                factor = 86400000
+            elif magnitude < 1e11: # seconds
+                factor = 1000
+            else: # milliseconds
+                factor = 1
+            
+            return np.round(values * factor).astype(np.int64)
         
-        # Loop through each player column to detect consecutive NaNs
-        for player in player_columns:
-            is_nan = ssg[player].isnull() # Boolean series: True where NaN
-            group = (is_nan != is_nan.shift()).cumsum() # Group consecutive same values
-            runs = is_nan.groupby(group).sum() # Sum NaNs in each run
-            consecutive_nan_runs = runs[runs >= 2] # Filter runs with 2 or more consecutive NaNs
+        elif time_format == "datetime-time":
             
-            # Increment count for each run length encountered
-            for run_length in consecutive_nan_runs:
-                for n in range(2, max_consecutive + 1):
-                    if run_length == n:
-                        consecutive_counts[n] += 1
-        
-        # Print counts of consecutive NaN runs per length
-        for n in range(2, max_consecutive + 1):
-            print(f"{n} consecutive NaNs: {consecutive_counts[n]}")
-
-        print("=" * 50)
+            # microseconds since midnight, rounded to milliseconds
+            return (PositionalData.timestamp_ticks(timestamps) + 500) // 1000
+        
+        else:
+            raise ValueError(f"Unsupported time format: {time_format}")
+    
+    
+    
+    def target_grid(start_ms, end_ms, rate):
+        
+        # number of samples between start and end (inclusive) at the requested rate
+        n = int(np.floor((end_ms - start_ms) * rate / 1000)) + 1
+        
+        steps = np.arange(max(n, 0))
+        
+        return pd.DataFrame({"Timestamp": start_ms + np.round(steps * 1000 / rate).astype(np.int64),
+                             "Start [s]": steps / rate})
+    
+    
+    
+    @Instrumentation.hook("resample")
+    def resample(ssg, dum_timeline, max_gap = None):
+        
+        """
+        Resamples all player columns onto the uniform timeline in one vectorised interpolation.
+        
+        Each column is interpolated linearly in time between its own valid samples; before the
+        first and after the last valid sample the nearest valid value is used (as with
+        DataFrame.interpolate(limit_direction="both")). Columns without any valid sample stay NaN.
+        
+        With max_gap, only gaps up to max_gap seconds are filled: a timeline point is left NaN if
+        its two neighbouring valid samples are further apart than max_gap (e.g. a player subbed
+        off or a unit switched off), and before the first / after the last valid sample the
+        nearest value is only held for up to max_gap seconds.
+        
+        Parameters:
+        ssg (pd.DataFrame): Team data from PositionalData.create_new_timeline
+                            (int64 millisecond 'Timestamp', ascending, then player columns)
+        dum_timeline (pd.DataFrame): Timeline from PositionalData.create_new_timeline
+        max_gap (float): Longest gap to fill in seconds (None fills all gaps)
+        
+        Returns:
+        pd.DataFrame: Columns 'Timestamp', 'Start [s]', then the player columns of ssg
+        pd.DataFrame: Boolean mask of the player columns, True where a value was filled in
+                      (no own sample within half a timeline step)
+        """
+        
+        t = ssg["Timestamp"].to_numpy(dtype = np.int64)
+        values = ssg.drop(columns = ["Timestamp"]).to_numpy(dtype = float)
+        grid = dum_timeline["Timestamp"].to_numpy(dtype = np.int64)
+        step = float(np.median(np.diff(grid))) if len(grid) > 1 else 1.0
+        
+        n = len(t)
+        valid = ~np.isnan(values)
+        rows = np.arange(n)[:, None]
+        
+        # last valid row at/before each row, first valid row at/after each row (per column)
+        prev_valid = np.maximum.accumulate(np.where(valid, rows, -1), axis = 0)
+        next_valid = np.minimum.accumulate(np.where(valid, rows, n)[::-1], axis = 0)[::-1]
+        
+        # last sample at/before each grid point
+        pos = np.searchsorted(t, grid, side = "right") - 1
+        
+        left = np.where(pos[:, None] >= 0, prev_valid[np.clip(pos, 0, None)], -1)
+        right = np.where(pos[:, None] + 1 < n, next_valid[np.clip(pos + 1, None, n - 1)], n)
+        
+        has_left = left >= 0
+        has_right = right < n
+        
+        # fall back to the nearest valid sample at the edges
+        left = np.where(has_left, left, right)
+        right = np.where(has_right, right, left)
+        
+        has_data = has_left | has_right
+        left = np.clip(left, 0, n - 1)
+        right = np.clip(right, 0, n - 1)
+        
+        t_left = t[left]
+        t_right = t[right]
+        v_left = np.take_along_axis(values, left, axis = 0)
+        v_right = np.take_along_axis(values, right, axis = 0)
+        
+        # linear interpolation in time
+        span = (t_right - t_left).astype(float)
+        weight = np.divide(grid[:, None] - t_left, span, out = np.zeros_like(span), where = span > 0)
+        
+        # distance to the nearest own sample; within half a step the point counts as observed
+        distance = np.minimum(np.abs(grid[:, None] - t_left), np.abs(t_right - grid[:, None]))
+        observed = has_data & (distance <= step / 2)
+        
+        if max_gap is not None:
+            # inner gaps: time between the neighbouring valid samples; edges: time to the nearest one
+            gap = np.where(has_left & has_right, span, distance)
+            has_data &= observed | (gap <= max_gap * 1000)
+        
+        resampled = np.where(has_data, v_left + weight * (v_right - v_left), np.nan)
+        
+        team_data = pd.DataFrame(resampled, columns = ssg.columns.drop("Timestamp"))
+        team_data.insert(0, "Timestamp", grid)
+        team_data.insert(1, "Start [s]", dum_timeline["Start [s]"].to_numpy())
+        
+        interpolated = pd.DataFrame(has_data & ~observed, columns = ssg.columns.drop("Timestamp"))
+        
+        filled = int(interpolated.to_numpy().sum())
+        left_out = int((~has_data).sum())
+        print (f"[OK] Resampled onto {len(grid)} timeline points: {filled} values filled in, {left_out} left empty \n")
+        
+        return team_data, interpolated
 
 
 #%%
 
 class Smoothing:
     
-    def savitzky_golay(playernum, team_data):
+    def coordinate_columns(team_data):
         
+        # Player coordinate columns by name ('{playername}_x', '{playername}_y')
+        return [c for c in team_data.columns if c.endswith(("_x", "_y"))]
+    
+    
+    
+    def filter_block(values, filter_func, min_length):
+        
+        """
+        Applies filter_func along axis 0 of a (frames x coordinates) array, leaving gaps (NaN) in place.
+        
+        Complete columns are filtered together in one call; columns with gaps (e.g. from
+        Resampling.resample with max_gap) are filtered per run of valid values, so that a gap
+        never spreads into its neighbours. Runs shorter than min_length are kept unfiltered.
         """
-        Apply Savitzky-Golay filter smoothing on player positional data columns.
+        
+        smoothed = values.copy()
+        
+        complete = ~np.isnan(values).any(axis = 0)
+        if complete.any() and len(values) >= min_length:
+            smoothed[:, complete] = filter_func(values[:, complete])
+        
+        for col in np.flatnonzero(~complete):
+            
+            # start and end of each run of valid values
+            edges = np.diff(np.pad(~np.isnan(values[:, col]), 1).astype(np.int8))
+            for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+                if end - start >= min_length:
+                    smoothed[start:end, col] = filter_func(values[start:end, col])
+        
+        return smoothed
+    
+    
+    
+    def smooth_coordinates(team_data, filter_func, min_length):
+        
+        # Filters the player coordinates of a wide DataFrame or of tracks (TeamTracks) and returns the same kind
+        if TeamTracks.is_tracks(team_data):
+            xy = team_data["xy"]
+            smoothed = Smoothing.filter_block(xy.reshape(len(xy), -1), filter_func, min_length)
+            return {**team_data, "xy": smoothed.reshape(xy.shape)}
+        
+        columns = Smoothing.coordinate_columns(team_data)
+        smoothed = Smoothing.filter_block(team_data[columns].to_numpy(dtype = float), filter_func, min_length)
+        
+        team_data = team_data.copy()
+        team_data[columns] = smoothed
+        
+        return team_data
+    
+    
+    
+    @Instrumentation.hook("smoothing")
+    def savitzky_golay(team_data, window_length = 7, polyorder = 1):
+        
+        """
+        Apply Savitzky-Golay filter smoothing on all player coordinate columns at once.
         
         Parameters:
-        - playernum: int, number of players (used to calculate column indices)
-        - team_data: pandas DataFrame containing player positional data
+        - team_data: pandas DataFrame containing player positional data ('{playername}_x', '{playername}_y'),
+                     or tracks from TeamTracks.from_frame
+        - window_length: int, number of points in the filter window (default 7)
+        - polyorder: int, order of the fitted polynomial (default 1, linear fitting)
         
         Returns:
-        - team_data: DataFrame with smoothed position data
+        - team_data: DataFrame (or tracks) with smoothed position data
         """
         
-        # Loop over columns corresponding to player positional data
-        # Assumes columns 2 to (playernum*2 + 1) contain relevant data (e.g., x and y coords per player)
-        for col in range (2, playernum*2+2):
-            # Apply Savitzky-Golay filter to smooth the data in the column
-            # window_length=7 means filter uses 7 points in the window, polyorder=1 means linear fitting
-            team_data.iloc[0:, col] = signal.savgol_filter(team_data.iloc[0:, col], window_length = 7, polyorder = 1)
+        import scipy.signal as signal
+        
+        # Filter the whole (frames x coordinates) array along the time axis
+        team_data = Smoothing.smooth_coordinates(team_data,
+                                                 lambda block: signal.savgol_filter(block, window_length = window_length, polyorder = polyorder, axis = 0),
+                                                 min_length = window_length)
         
         print("\n")
         print("-" * 50)
@@ -1006,29 +1445,32 @@ class Smoothing:
     
     
     
-    def butterworth_low_path_filter(playernum, team_data, fs, order, cutoff):
+    @Instrumentation.hook("smoothing")
+    def butterworth_low_path_filter(team_data, fs, order, cutoff):
         
         """
-        - playernum (int): Number of players.
-        - team_data (pd.DataFrame): DataFrame containing tracking data, with player X/Y columns starting from column 2.
+        - team_data (pd.DataFrame): DataFrame containing tracking data ('{playername}_x', '{playername}_y'),
+                                    or tracks from TeamTracks.from_frame (returned as tracks).
         - fs (float): Sampling frequency (Hz).
         - order (int): Filter order (e.g., 3 or 4).
         - cutoff (float): Cutoff frequency (Hz).
         """
             
+        import scipy.signal as signal
+        
         # Normalize the frequency (cutoff / Nyquist frequency)
         nyquist = 0.5 * fs
         normal_cutoff = cutoff / nyquist
             
-        # Get the filter coefficients
-        b, a = signal.butter(order, normal_cutoff, btype='low', analog=False)
+        # Get the filter as second-order sections (numerically stable for higher orders)
+        sos = signal.butter(order, normal_cutoff, btype='low', analog=False, output='sos')
         
-        # Loop over columns corresponding to player positional data
-        # Assumes columns 2 to (playernum*2 + 1) contain relevant data (e.g., x and y coords per player)
-        for col in range (2, playernum*2+2):
-            # Apply zero-phase Butterworth filter to smooth the data in the current column
-            # filtfilt applies the filter forward and backward to avoid phase shift
-            team_data.iloc[0:, col] = signal.filtfilt(b, a, team_data.iloc[0:, col])
+        # Apply zero-phase Butterworth filter to the whole (frames x coordinates) array
+        # sosfiltfilt applies the filter forward and backward to avoid phase shift
+        padlen = 3 * (2 * len(sos) + 1 - min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum())) # default of sosfiltfilt
+        team_data = Smoothing.smooth_coordinates(team_data,
+                                                 lambda block: signal.sosfiltfilt(sos, block, axis = 0),
+                                                 min_length = padlen + 1)
         
         print("\n")
         print("-" * 50)
@@ -1043,6 +1485,9 @@ class VisualInspection:
     
     def plot_pitch_players (pitch, players, sec):
         
+        import matplotlib.pyplot as plt
+        from shapely.geometry import LinearRing
+        
         # Get pitch outline coordinates (closed polygon)
         ini_pitch_x, ini_pitch_y = LinearRing(zip(pitch['X'], pitch['Y'])).xy # plot for visualisation (explicitly closed polygon)
         
@@ -1053,16 +1498,19 @@ class VisualInspection:
         x_cols = [c for c in players.columns if "_x" in c]
         y_cols = [c for c in players.columns if "_y" in c]
         
+        # Row closest to the time point (any sampling rate)
+        row = (players['Start [s]'] - sec).abs().idxmin()
+        
         # Plot player positions
-        x_vals = players.loc[sec * 10, x_cols]
-        y_vals = players.loc[sec * 10, y_cols]
+        x_vals = players.loc[row, x_cols]
+        y_vals = players.loc[row, y_cols]
         plt.scatter(x_vals, y_vals, color='red', zorder=1)
     
         # Add player labels
         for x_col, y_col in zip(x_cols, y_cols):
             player_id = x_col[:-2]  # Remove "_x" to get ID like 'ID67'
-            x = players.loc[sec * 10, x_col]
-            y = players.loc[sec * 10, y_col]
+            x = players.loc[row, x_col]
+            y = players.loc[row, y_col]
             plt.text(x, y, player_id, fontsize=9, ha='center', va='bottom', zorder=4)
     
         plt.suptitle(f"Time (since session started): {sec}s")
@@ -1071,6 +1519,232 @@ class VisualInspection:
         # Save the figure as PNG
         plt.savefig(f"{sec}s.png", bbox_inches="tight")
         
+        # Release the pyplot figure, so repeated calls (e.g. one per second of a session) do not pile up figures
+        plt.close(fig)
+        
         return fig
-
-
+    
+    
+    
+    ## figure for bulk rendering: pitch drawn once, player artists updated in place
+    def player_canvas(pitch, players, dpi = 100, margin = 5):
+        
+        """
+        Creates an off-screen figure of the pitch with one scatter and one label per player.
+        
+        The pitch and axes are rendered once and kept as background; VisualInspection.draw_frame
+        only redraws the player artists on top of it (blitting).
+        
+        Parameters:
+        - pitch: DataFrame with 'X' and 'Y' (rotated pitch vertices)
+        - players: team data ('Start [s]', '{playername}_x', '{playername}_y')
+        - dpi: resolution of the frames
+        - margin: space around the pitch (in metres)
+        
+        Returns:
+        - dict of the figure, canvas, background and player artists
+        """
+        
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from shapely.geometry import LinearRing
+        
+        # Get pitch outline coordinates (closed polygon)
+        ini_pitch_x, ini_pitch_y = LinearRing(zip(pitch['X'], pitch['Y'])).xy
+        
+        # Figure outside pyplot, so it is released with the canvas (no global figure manager)
+        fig = Figure(dpi = dpi)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        
+        ax.plot(ini_pitch_x, ini_pitch_y, "g", alpha=0.7, linewidth=3, solid_capstyle='round', zorder=2)
+        ax.set_xlim(min(ini_pitch_x) - margin, max(ini_pitch_x) + margin)
+        ax.set_ylim(min(ini_pitch_y) - margin, max(ini_pitch_y) + margin)
+        ax.set_aspect('equal')
+        
+        # Select player position columns
+        x_cols = [c for c in players.columns if c.endswith("_x")]
+        y_cols = [f"{c[:-2]}_y" for c in x_cols]
+        
+        # Player artists, animated: left out of the background and drawn per frame
+        scatter = ax.scatter(np.zeros(len(x_cols)), np.zeros(len(x_cols)), color='red', zorder=1, animated=True)
+        labels = [ax.text(0, 0, x_col[:-2], fontsize=9, ha='center', va='bottom', zorder=4, animated=True) for x_col in x_cols]
+        title = fig.suptitle(" ", animated=True)
+        
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+        
+        return {"fig": fig, "canvas": canvas, "ax": ax, "background": background,
+                "scatter": scatter, "labels": labels, "title": title,
+                "x_cols": x_cols, "y_cols": y_cols}
+    
+    
+    
+    def draw_frame(view, x_vals, y_vals, sec):
+        
+        """
+        Draws the players of one time point onto the pitch background of VisualInspection.player_canvas.
+        
+        Returns:
+        - np.ndarray (height, width, 4) RGBA image, valid until the next call
+        """
+        
+        canvas = view["canvas"]
+        canvas.restore_region(view["background"])
+        
+        # Players without data at this time point are hidden
+        present = ~(np.isnan(x_vals) | np.isnan(y_vals))
+        view["scatter"].set_offsets(np.column_stack((x_vals, y_vals))[present])
+        view["ax"].draw_artist(view["scatter"])
+        
+        for label, x, y, show in zip(view["labels"], x_vals, y_vals, present):
+            if show:
+                label.set_position((x, y))
+                view["ax"].draw_artist(label)
+        
+        view["title"].set_text(f"Time (since session started): {sec:.1f}s")
+        view["fig"].draw_artist(view["title"])
+        
+        return np.asarray(canvas.buffer_rgba())
+    
+    
+    
+    ## render a range of frames in one process
+    def render_segment(pitch, players, rows, output, fmt, fps, dpi, first_number = 0):
+        
+        view = VisualInspection.player_canvas(pitch, players, dpi)
+        
+        x_vals = players[view["x_cols"]].to_numpy(dtype = float)[rows]
+        y_vals = players[view["y_cols"]].to_numpy(dtype = float)[rows]
+        secs = players['Start [s]'].to_numpy(dtype = float)[rows]
+        
+        width, height = view["canvas"].get_width_height()
+        
+        if fmt == "png":
+            from PIL import Image
+            
+            for number, (x, y, sec) in enumerate(zip(x_vals, y_vals, secs), start = first_number):
+                Image.fromarray(VisualInspection.draw_frame(view, x, y, sec)).save(os.path.join(output, f"frame_{number:06d}.png"), compress_level = 1)
+        
+        elif fmt == "gif":
+            from PIL import Image
+            
+            frames = [Image.fromarray(VisualInspection.draw_frame(view, x, y, sec)).convert("RGB").quantize(colors = 64)
+                      for x, y, sec in zip(x_vals, y_vals, secs)]
+            frames[0].save(output, save_all = True, append_images = frames[1:], duration = 1000 / fps, loop = 0)
+        
+        elif fmt == "mp4":
+            import subprocess
+            
+            # raw RGBA frames piped to ffmpeg (sizes padded to even numbers for yuv420p)
+            command = [VisualInspection.ffmpeg_path(), "-y", "-loglevel", "error",
+                       "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                       "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-vcodec", "libx264", "-pix_fmt", "yuv420p", output]
+            
+            with subprocess.Popen(command, stdin = subprocess.PIPE) as process:
+                for x, y, sec in zip(x_vals, y_vals, secs):
+                    process.stdin.write(VisualInspection.draw_frame(view, x, y, sec).tobytes())
+                process.stdin.close()
+            
+            if process.returncode != 0:
+                raise ValueError(f"ffmpeg failed to write {output} (exit code {process.returncode}).")
+        
+        return len(rows)
+    
+    
+    
+    def ffmpeg_path():
+        
+        import shutil
+        import matplotlib
+        
+        path = shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+        
+        if path is None:
+            raise FileNotFoundError("ffmpeg not found; install ffmpeg for MP4 export or render a GIF/PNG sequence instead.")
+        
+        return path
+    
+    
+    
+    ## export a time range as video, GIF or PNG sequence
+    def render_frames(pitch, players, output, start = None, end = None, step = 1, fps = None, workers = 1, dpi = 100):
+        
+        """
+        Renders the players on the pitch for every time point in a range.
+        
+        The pitch is drawn once per worker and only the player artists are redrawn per frame,
+        so long sessions can be reviewed frame by frame in minutes.
+        
+        Parameters:
+        - pitch: DataFrame with 'X' and 'Y' (rotated pitch vertices)
+        - players: team data ('Start [s]', '{playername}_x', '{playername}_y'), e.g. ssg_10Hz
+        - output: '.mp4' or '.gif' file, or a folder for a numbered PNG sequence (frame_000000.png, ...)
+        - start, end: time range in seconds since the session started (None for first/last time point)
+        - step: render every step-th time point
+        - fps: frames per second of the video, default the sampling rate of players divided by step (real time)
+        - workers: processes rendering parts of the range at the same time (PNG sequence and MP4)
+        - dpi: resolution of the frames
+        
+        Returns:
+        - int: number of rendered frames
+        """
+        
+        secs = players['Start [s]'].to_numpy(dtype = float)
+        
+        selected = np.ones(len(secs), dtype = bool)
+        if start is not None:
+            selected &= secs >= start
+        if end is not None:
+            selected &= secs <= end
+        rows = np.flatnonzero(selected)[::step]
+        
+        if not len(rows):
+            raise ValueError("No time points in the selected range.")
+        
+        if fps is None:
+            fps = 1 / (np.median(np.diff(secs)) * step) if len(secs) > 1 else 1
+        
+        fmt = os.path.splitext(str(output))[1].lower().lstrip(".") or "png"
+        
+        if fmt not in ("png", "gif", "mp4"):
+            raise ValueError(f"Unsupported output format: {fmt} (use .mp4, .gif or a folder for PNG frames)")
+        
+        if fmt == "png":
+            os.makedirs(output, exist_ok = True)
+        elif fmt == "mp4":
+            VisualInspection.ffmpeg_path()
+        
+        workers = 1 if fmt == "gif" else max(1, min(workers, len(rows)))
+        
+        if workers == 1:
+            VisualInspection.render_segment(pitch, players, rows, output, fmt, fps, dpi)
+        
+        else:
+            import tempfile
+            
+            parts = np.array_split(rows, workers)
+            first_numbers = np.cumsum([0] + [len(part) for part in parts[:-1]])
+            
+            with tempfile.TemporaryDirectory(dir = os.path.dirname(os.path.abspath(output))) as tmp_dir:
+                
+                # PNG frames go straight into the output folder; MP4 parts are joined afterwards
+                part_outputs = [output if fmt == "png" else os.path.join(tmp_dir, f"part_{i:03d}.mp4") for i in range(workers)]
+                
+                with WorkerPool.executor(workers) as executor:
+                    list(executor.map(VisualInspection.render_segment, [pitch] * workers, [players] * workers, parts,
+                                      part_outputs, [fmt] * workers, [fps] * workers, [dpi] * workers, first_numbers))
+                
+                if fmt == "mp4":
+                    import subprocess
+                    
+                    part_list = os.path.join(tmp_dir, "parts.txt")
+                    with open(part_list, "w") as f:
+                        f.writelines(f"file '{path}'\n" for path in part_outputs)
+                    
+                    subprocess.run([VisualInspection.ffmpeg_path(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                                    "-i", part_list, "-c", "copy", str(output)], check = True)
+        
+        print (f"[OK] {len(rows)} frames rendered to {output} \n")
+        
+        return len(rows)
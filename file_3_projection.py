@@ -0,0 +1,235 @@
+import math
+import numpy as np
+
+#%%
+class MapProjection:
+
+    # Constants for the WGS84 ellipsoid and UTM projection (in km, as in the original series)
+    a = 6378.137 # Semi-major axis of the Earth (in km)
+    e = 0.0818192 # Eccentricity of the Earth's ellipsoid
+    k0 = 0.9996 # Scale factor for UTM
+    E0 = 500 # False Easting (in km) for UTM zone
+    N0_south = 10000 # False Northing (in km) for southern hemisphere; 0 for northern hemisphere
+
+
+    ## UTM zone shared by a whole array of longitudes
+    def utm_zone(lons):
+
+        """
+        Select one UTM zone for an array of longitudes.
+
+        The zone rule is the one used by the original per-point loop, int(lon / 6) + 31,
+        applied to the mean longitude so that every sample of a pitch or a player track
+        is projected with the same central meridian.
+
+        Parameters:
+        - lons: array-like of longitudes (degrees)
+
+        Returns:
+        - int, UTM zone number
+        """
+
+        lons = np.asarray(lons, dtype=float)
+
+        if not np.isfinite(lons).any():
+            raise ValueError("No valid longitude found for UTM zone selection.")
+
+        return int(np.nanmean(lons) / 6) + 31
+
+
+    ## hemisphere shared by a whole array of latitudes
+    def hemisphere(lats):
+
+        lats = np.asarray(lats, dtype=float)
+
+        if not np.isfinite(lats).any():
+            raise ValueError("No valid latitude found for hemisphere selection.")
+
+        return "N" if np.nanmean(lats) >= 0 else "S"
+
+
+    ## map projection of whole latitude/longitude arrays
+    def wgs84_to_utm(lats, lons, zone = None, hemisphere = None):
+
+        """
+        Convert geographic coordinates into UTM cartesian coordinates (in metres).
+
+        Vectorised version of the series previously looped point by point in
+        PitchRotation.coordinates_to_field and PositionalData.team_tracking.
+
+        Parameters:
+        - lats, lons: array-like of latitudes/longitudes (degrees), same length
+        - zone: int, UTM zone; selected from lons if None
+        - hemisphere: "N" or "S"; selected from lats if None
+
+        Returns:
+        - UTME, UTMN: np.ndarray of Easting and Northing (in metres)
+        """
+
+        a, e, k0, E0 = MapProjection.a, MapProjection.e, MapProjection.k0, MapProjection.E0
+
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+
+        if zone is None:
+            zone = MapProjection.utm_zone(lons)
+
+        if hemisphere is None:
+            hemisphere = MapProjection.hemisphere(lats)
+
+        # False Northing (in km); 0 for northern hemisphere
+        N0 = 0 if hemisphere == "N" else MapProjection.N0_south
+
+        # Calculate the central meridian of the UTM zone in radians
+        lamda0 = ((zone - 1) * 6 - 180 + 3) * np.pi / 180
+
+        # Convert latitude and longitude to radians
+        phi = lats * np.pi / 180
+        lamda = lons * np.pi / 180
+
+        sin_phi = np.sin(phi)
+        cos_phi = np.cos(phi)
+        tan_phi = np.tan(phi)
+
+        # Calculate radius of curvature in the prime vertical
+        v = 1 / np.sqrt(1 - e ** 2 * sin_phi ** 2)
+
+        # Auxiliary values used in projection
+        A = (lamda - lamda0) * cos_phi
+        T = tan_phi ** 2
+        C = e ** 2 * cos_phi * cos_phi / (1 - e ** 2)
+
+        # Meridian arc length from the equator to latitude
+        s = (1 - e ** 2 / 4 - 3 * e ** 4 / 64 - 5 * e ** 6 / 256) * phi - \
+            (3 * e ** 2 / 8 + 3 * e ** 4 / 32 + 45 * e ** 6 / 1024) * np.sin(2 * phi) + \
+            (15 * e ** 4 / 256 + 45 * e ** 6 / 1024) * np.sin(4 * phi) - \
+            35 * e ** 6 / 3072 * np.sin(6 * phi)
+
+        # Calculate Easting (UTME) and Northing (UTMN) using UTM projection formula
+        UTME = E0 + k0 * a * v * (A + (1 - T + C) * A ** 3 / 6 + (5 - 18 * T + T ** 2) * A ** 5 / 120)
+        UTMN = N0 + k0 * a * (s + v * tan_phi * (A ** 2 / 2 + (5 - T + 9 * C + 4 * C ** 2) * A ** 4 / 24 + (61 - 58 * T + T ** 2) * A ** 6 / 720))
+
+        # Convert from kilometers to meters
+        return UTME * 1000, UTMN * 1000
+
+
+    ## pitch/player (X, Y) as used throughout the pipeline
+    def to_field_xy(lats, lons, zone = None, hemisphere = None):
+
+        """
+        Project latitude/longitude arrays to the pipeline's field coordinates.
+
+        Following the original implementation, X holds the Northing and Y holds the Easting.
+
+        Returns:
+        - np.ndarray of shape (N, 2) with columns X, Y (in metres)
+        """
+
+        UTME, UTMN = MapProjection.wgs84_to_utm(lats, lons, zone, hemisphere)
+
+        return np.column_stack((UTMN, UTME))
+
+
+    ## original point-by-point series, kept as a reference for checking
+    def loop_reference(lats, lons):
+
+        a, e, k0, E0 = MapProjection.a, MapProjection.e, MapProjection.k0, MapProjection.E0
+        N0 = 0
+
+        lon1 = []
+        lat1 = []
+
+        for lat, lon in zip(lats, lons):
+            Zonenum = int(lon / 6) + 31
+            lamda0 = (Zonenum - 1) * 6 - 180 + 3
+            lamda0 = lamda0 * math.pi / 180
+            phi = lat * math.pi / 180
+            lamda = lon * math.pi / 180
+            v = 1 / math.sqrt(1 - e ** 2 * math.sin(phi) ** 2)
+            A = (lamda - lamda0) * math.cos(phi)
+            T = math.tan(phi) ** 2
+            C = e ** 2 * math.cos(phi) * math.cos(phi) / (1 - e ** 2)
+            s = (1 - e ** 2 / 4 - 3 * e ** 4 / 64 - 5 * e ** 6 / 256) * phi - \
+                (3 * e ** 2 / 8 + 3 * e ** 4 / 32 + 45 * e ** 6 / 1024) * math.sin(2 * phi) + \
+                (15 * e ** 4 / 256 + 45 * e ** 6 / 1024) * math.sin(4 * phi) - \
+                35 * e ** 6 / 3072 * math.sin(6 * phi)
+            UTME = E0 + k0 * a * v * (A + (1 - T + C)*A ** 3 / 6+(5 - 18 * T + T ** 2) * A ** 5 / 120)
+            UTMN = N0 + k0 * a * (s + v * math.tan(phi) * (A ** 2 / 2 + (5 - T + 9 * C + 4 * C ** 2) * A ** 4 / 24 + (61 - 58 * T + T ** 2) * A ** 6 / 720))
+            lat1.append(UTME * 1000)
+            lon1.append(UTMN * 1000)
+
+        return np.column_stack((lon1, lat1))
+
+
+    ## check the vectorised engine against the original loop
+    def check_against_loop(lats, lons, tolerance = 0.001):
+
+        """
+        Compare MapProjection.to_field_xy with the original per-point loop.
+
+        The loop selects the zone of every point, while the engine shares one zone per array,
+        so points are compared zone by zone and hemisphere by hemisphere. The reference loop
+        always uses a False Northing of 0, so the constant offset is removed for southern points.
+
+        Parameters:
+        - lats, lons: array-like of latitudes/longitudes (degrees)
+        - tolerance: float, maximum allowed deviation (in metres), default sub-millimetre
+
+        Returns:
+        - float, maximum absolute deviation (in metres)
+        """
+
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+
+        reference = MapProjection.loop_reference(lats, lons)
+        xy = np.empty_like(reference)
+
+        zones = (lons / 6).astype(int) + 31 # zone rule of the original loop
+        southern = lats < 0
+
+        for zone in np.unique(zones):
+            for south in (False, True):
+                group = (zones == zone) & (southern == south)
+                if group.any():
+                    xy[group] = MapProjection.to_field_xy(lats[group], lons[group], int(zone), "S" if south else "N")
+                    if south:
+                        xy[group, 0] -= MapProjection.N0_south * 1000
+
+        max_dev = float(np.max(np.abs(xy - reference)))
+
+        if max_dev > tolerance:
+            raise ValueError(f"Vectorised projection deviates from the original loop by {max_dev} m (tolerance {tolerance} m).")
+
+        print (f"[OK] Vectorised projection matches the original loop on {len(lats)} points (max deviation {max_dev:.2e} m) \n")
+
+        return max_dev
+
+
+    ## one-off check over a latitude/longitude grid
+    def check_grid(tolerance = 0.001):
+
+        """
+        Run MapProjection.check_against_loop over a global grid of latitudes and longitudes.
+
+        The grid covers both hemispheres (80 S to 80 N) and adds points on either side of
+        zone boundaries. Run it once after changing the projection: python file_3_projection.py
+
+        Returns:
+        - float, maximum absolute deviation (in metres)
+        """
+
+        lats = np.arange(-80, 80.5, 2.5)
+
+        # every 1.5 degrees, plus both sides of the boundaries at 6 W, 0 and 6 E
+        lons = np.concatenate((np.arange(-177, 178.5, 1.5), [-6.0001, -5.9999, -0.0001, 0.0001, 5.9999, 6.0001]))
+
+        grid_lats, grid_lons = np.meshgrid(lats, lons)
+
+        return MapProjection.check_against_loop(grid_lats.ravel(), grid_lons.ravel(), tolerance)
+
+
+#%% check the vectorised projection against the original loop (run once, not part of the pipeline)
+
+if __name__ == "__main__":
+    MapProjection.check_grid()
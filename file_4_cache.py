@@ -0,0 +1,167 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+from datetime import time
+
+#%%
+class TrackCache:
+
+    # Bump when the content of cached tracks changes (e.g. projection or calibration steps)
+    version = 3
+
+
+    ## content hash of a file
+    def file_hash(path, chunk_size = 1 << 20):
+
+        digest = hashlib.sha256()
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+
+    ## cache keys of all positional data files
+    def track_keys(file_dir, pitch_path, time_format, start_ts, end_ts, origin = None, options = (), zone = None, hemisphere = None):
+
+        """
+        Build one cache key per positional data file.
+
+        The key combines the content hash of the raw file, the content hash of the pitch
+        file (which determines the rotation matrix and pitch origin) and the session window,
+        so a changed export, pitch or split never reuses an outdated track.
+
+        Parameters:
+        - file_dir: folder containing the positional data (csv files)
+        - pitch_path: path to the pitch file
+        - time_format: "Unix" or "datetime-time"
+        - start_ts, end_ts: session start and end timestamps
+        - origin: pitch origin passed to PositionalData.player_tracking (None if not translated)
+        - options: other player_tracking options affecting the tracks (e.g. window tolerance/policy)
+        - zone, hemisphere: UTM zone and hemisphere the tracks are projected in (PitchRotation.pitch_projection)
+
+        Returns:
+        - dict: mapping of file name to cache key, in directory order
+        """
+
+        pitch_hash = TrackCache.file_hash(pitch_path)
+
+        session = f"{time_format}|{start_ts}|{end_ts}|{origin is not None}|{options}|{zone}|{hemisphere}|v{TrackCache.version}"
+
+        keys = {}
+
+        for file in [f for f in os.listdir(file_dir) if f.endswith('.csv')]:
+            raw_hash = TrackCache.file_hash(os.path.join(file_dir, file))
+            keys[file] = hashlib.sha256(f"{raw_hash}|{pitch_hash}|{session}".encode()).hexdigest()
+
+        return keys
+
+
+    ## read cached tracks
+    def load_tracks(cache_dir, keys):
+
+        """
+        Load cached player tracks.
+
+        Parameters:
+        - cache_dir: cache folder (None disables the cache)
+        - keys: dict from TrackCache.track_keys
+
+        Returns:
+        - dict: mapping of file name to track (pd.DataFrame), or None if not cached
+        """
+
+        tracks = {file: None for file in keys}
+
+        if cache_dir is None or not os.path.isdir(cache_dir):
+            return tracks
+
+        for file, key in keys.items():
+            path = os.path.join(cache_dir, f"{key}.npz")
+
+            if not os.path.exists(path):
+                continue
+
+            with np.load(path, allow_pickle = False) as cached:
+                columns = cached["columns"].tolist()
+                timestamp = cached["timestamp"]
+
+                # datetime-time timestamps are stored as microseconds since midnight
+                if cached["time_of_day"]:
+                    timestamp = [time(t // 3600000000, t // 60000000 % 60, t // 1000000 % 60, t % 1000000) for t in timestamp.tolist()]
+
+                tracks[file] = pd.DataFrame({columns[0]: timestamp,
+                                             columns[1]: cached["xy"][:, 0],
+                                             columns[2]: cached["xy"][:, 1]})
+
+            # mark as recently used for LRU eviction
+            os.utime(path)
+
+        hits = sum(track is not None for track in tracks.values())
+        print (f"[OK] {hits} of {len(tracks)} player tracks loaded from cache \n")
+
+        return tracks
+
+
+    ## write tracks to the cache
+    def save_tracks(cache_dir, keys, tracks, max_size_mb = 500):
+
+        """
+        Save player tracks (from PositionalData.player_tracking) as uncompressed .npz files
+        and evict least recently used entries above max_size_mb.
+        """
+
+        if cache_dir is None:
+            return
+
+        os.makedirs(cache_dir, exist_ok = True)
+
+        for file, track in tracks.items():
+            path = os.path.join(cache_dir, f"{keys[file]}.npz")
+
+            if os.path.exists(path):
+                continue
+
+            timestamp = track.iloc[:, 0]
+            time_of_day = len(timestamp) > 0 and isinstance(timestamp.iloc[0], time)
+
+            if time_of_day:
+                timestamp = np.array([((t.hour * 60 + t.minute) * 60 + t.second) * 1000000 + t.microsecond for t in timestamp], dtype = np.int64)
+            else:
+                timestamp = timestamp.to_numpy(dtype = float)
+
+            # write to a temporary file first so that an interrupted run leaves no partial entry
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f,
+                         columns = np.array(track.columns, dtype = str),
+                         timestamp = timestamp,
+                         xy = track.iloc[:, 1:3].to_numpy(dtype = float),
+                         time_of_day = np.array(time_of_day))
+            os.replace(tmp_path, path)
+
+        TrackCache.evict(cache_dir, max_size_mb)
+
+
+    ## least-recently-used eviction
+    def evict(cache_dir, max_size_mb):
+
+        entries = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir) if f.endswith(".npz")]
+        entries = sorted(entries, key = os.path.getmtime) # least recently used first
+
+        total = sum(os.path.getsize(path) for path in entries)
+        max_size = max_size_mb * 1024 * 1024
+
+        removed = 0
+        for path in entries:
+            if total <= max_size:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+            removed += 1
+
+        if removed:
+            print (f"[OK] {removed} least recently used track(s) removed from cache ({total / 1024 / 1024:.1f} MB kept) \n")
@@ -0,0 +1,242 @@
+from file_2_preprocessing import FileDetection
+
+import os
+import io
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import contextlib
+import pandas as pd
+
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+#%%
+class SessionBatch:
+
+    # Files written into each session folder
+    status_name = "batch_status.json"
+    log_name = "batch_log.txt"
+
+    # Columns of batch_report.csv (also written when no session is found)
+    report_columns = ["session", "status", "started", "seconds", "returncode", "error", "log"]
+
+
+    ## find session folders below a root folder
+    def discover_sessions(root):
+
+        """
+        Finds all folders that contain a positional data folder, a pitch file and a session file
+        (same rules as FileDetection.detect_file_folder_name).
+
+        Parameters:
+        - root: folder to search (recursively)
+
+        Returns:
+        - list of session folder paths, sorted
+        """
+
+        sessions = []
+
+        for dirpath, dirnames, filenames in os.walk(root):
+
+            # FileDetection prints its findings; keep the batch output short
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    _, _, position_folder = FileDetection.detect_file_folder_name(dirpath)
+            except FileNotFoundError:
+                continue
+
+            sessions.append(dirpath)
+
+            # do not look for sessions inside the positional data folder
+            if position_folder in dirnames:
+                dirnames.remove(position_folder)
+
+        return sorted(sessions)
+
+
+    ## fingerprint of the inputs of one session
+    def input_fingerprint(session_dir):
+
+        # names, sizes and modification times of the detected input files
+        with contextlib.redirect_stdout(io.StringIO()):
+            session_file, pitch_file, position_folder = FileDetection.detect_file_folder_name(session_dir)
+
+        paths = [os.path.join(session_dir, session_file), os.path.join(session_dir, pitch_file)]
+        position_dir = os.path.join(session_dir, position_folder)
+        paths += [os.path.join(position_dir, f) for f in sorted(os.listdir(position_dir)) if f.endswith('.csv')]
+
+        digest = hashlib.sha256()
+        for path in paths:
+            stat = os.stat(path)
+            digest.update(f"{os.path.relpath(path, session_dir)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+
+        return digest.hexdigest()
+
+
+    ## check if a session was already completed with the same inputs
+    def is_completed(session_dir):
+
+        status_path = os.path.join(session_dir, SessionBatch.status_name)
+
+        if not os.path.exists(status_path):
+            return False
+
+        try:
+            with open(status_path) as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        return status.get("status") == "completed" and status.get("fingerprint") == SessionBatch.input_fingerprint(session_dir)
+
+
+    ## run the pipeline for one session folder
+    def run_session(session_dir, script, timeout = None):
+
+        """
+        Runs the pipeline script (file_7_pipeline.py) for one session folder in a separate process.
+
+        The console output is written to batch_log.txt and the outcome to batch_status.json
+        in the session folder. Figures, if the script makes any, are saved in the session folder
+        (non-interactive backend).
+
+        Returns:
+        - dict: record for the summary report
+        """
+
+        record = {"session": session_dir, "started": datetime.now().isoformat(timespec = "seconds")}
+        log_path = os.path.join(session_dir, SessionBatch.log_name)
+
+        env = dict(os.environ, MPLBACKEND = "Agg")
+        start = time.perf_counter()
+
+        try:
+            fingerprint = SessionBatch.input_fingerprint(session_dir)
+
+            with open(log_path, "w") as log:
+                result = subprocess.run([sys.executable, script, session_dir], cwd = session_dir, env = env,
+                                        stdout = log, stderr = subprocess.STDOUT, timeout = timeout)
+
+            record["status"] = "completed" if result.returncode == 0 else "failed"
+            record["returncode"] = result.returncode
+
+        except subprocess.TimeoutExpired:
+            fingerprint = None
+            record["status"] = "failed"
+            record["returncode"] = None
+
+        except OSError as error:
+            fingerprint = None
+            record["status"] = "failed"
+            record["returncode"] = None
+            record["error"] = str(error)
+
+        record["seconds"] = round(time.perf_counter() - start, 2)
+        record["log"] = log_path
+
+        # last line of the log usually names the error
+        if record["status"] == "failed" and "error" not in record:
+            record["error"] = SessionBatch.last_log_line(log_path, timeout)
+
+        with open(os.path.join(session_dir, SessionBatch.status_name), "w") as f:
+            json.dump(dict(record, fingerprint = fingerprint), f, indent = 2)
+
+        print (f"[{record['status']}] {session_dir} ({record['seconds']} s)")
+
+        return record
+
+
+    def last_log_line(log_path, timeout = None):
+
+        try:
+            with open(log_path) as f:
+                lines = [line.strip() for line in f if line.strip()]
+        except OSError:
+            lines = []
+
+        if not lines:
+            return f"Timeout after {timeout} s" if timeout else "No output"
+
+        return lines[-1]
+
+
+    ## run many sessions through a job queue
+    def run_batch(root, script = None, workers = 1, force = False, timeout = None, report_path = None):
+
+        """
+        Processes all session folders below root with the headless pipeline (file_7_pipeline.py).
+
+        Completed sessions (same inputs as in their batch_status.json) are skipped unless force is True.
+        A failing session is recorded and does not stop the batch.
+
+        Parameters:
+        - root: folder containing the session folders
+        - script: pipeline script taking the session folder as its argument,
+                  default file_7_pipeline.py next to this file (e.g. file_1_main_analysis.py to also save figures)
+        - workers: number of sessions processed at the same time
+        - force: re-run completed sessions
+        - timeout: maximum seconds per session (None for no limit)
+        - report_path: summary report (.csv), default batch_report.csv in root
+
+        Returns:
+        - pd.DataFrame: one row per session
+        """
+
+        if script is None:
+            script = os.path.join(Path(__file__).resolve().parent, "file_7_pipeline.py")
+
+        if not os.path.isdir(root):
+            print (f"Friendly reminder: {root} is not a folder, please check the path. \n")
+
+        if report_path is None:
+            # the report goes to the current folder if root does not exist
+            report_path = os.path.join(root if os.path.isdir(root) else os.getcwd(), "batch_report.csv")
+
+        sessions = SessionBatch.discover_sessions(root)
+
+        print ("\n" + '-' * 30 + "\n")
+        print (f"{len(sessions)} session folder(s) found in {root} \n")
+
+        records = []
+        queue = []
+
+        for session_dir in sessions:
+            if not force and SessionBatch.is_completed(session_dir):
+                records.append({"session": session_dir, "status": "skipped"})
+            else:
+                queue.append(session_dir)
+
+        print (f"{len(records)} already completed, {len(queue)} to process \n")
+
+        with ThreadPoolExecutor(max_workers = max(1, workers)) as executor:
+            records += list(executor.map(lambda session_dir: SessionBatch.run_session(session_dir, script, timeout), queue))
+
+        report = pd.DataFrame(records, columns = SessionBatch.report_columns).sort_values("session").reset_index(drop = True)
+        report.to_csv(report_path, index = False)
+
+        print ("\n" + '-' * 30 + "\n")
+        print ("Batch summary:\n")
+        print (report["status"].value_counts().to_string() if len(report) else "0 sessions found, nothing processed")
+        print (f"\nReport saved to {report_path} \n")
+
+        return report
+
+
+#%% run from the command line
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Process all session folders below a root folder.")
+    parser.add_argument("root", help = "folder containing the session folders")
+    parser.add_argument("--workers", type = int, default = 1, help = "sessions processed at the same time")
+    parser.add_argument("--force", action = "store_true", help = "re-run completed sessions")
+    parser.add_argument("--timeout", type = float, default = None, help = "maximum seconds per session")
+    parser.add_argument("--report", default = None, help = "summary report path (.csv)")
+    args = parser.parse_args()
+
+    SessionBatch.run_batch(args.root, workers = args.workers, force = args.force, timeout = args.timeout, report_path = args.report)
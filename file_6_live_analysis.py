@@ -0,0 +1,468 @@
+from file_2_preprocessing import PitchRotation
+from file_2_preprocessing import PositionalData
+from file_2_preprocessing import Resampling
+from file_3_projection import MapProjection
+from file_4_cache import TrackCache
+
+import os
+import io
+import json
+import time
+import socket
+import argparse
+import numpy as np
+import pandas as pd
+import scipy.signal as signal
+
+from pathlib import Path
+
+#%%
+class LiveTracking:
+
+    # Pitch transform cached next to the pitch file
+    transform_name = "live_pitch_transform.json"
+
+
+    ## rotation matrix and projection settings of a pitch, computed once
+    def pitch_transform(pitch_path, translate = False):
+
+        """
+        Computes the pitch transform (UTM zone, hemisphere, rotation matrix, pitch origin) used to
+        project and rotate live samples, as in file_1_main_analysis.py.
+
+        The transform is cached in live_pitch_transform.json next to the pitch file and reused
+        while the pitch file is unchanged, so starting a live session does not redo the pitch steps.
+
+        Parameters:
+        - pitch_path: path to the pitch file (.csv, .xls, .xlsx)
+        - translate: move the pitch origin (bottom-left corner) to (0, 0)
+
+        Returns:
+        - dict with 'zone', 'hemisphere', 'rotation_matrix', 'origin' (None if not translated)
+          and 'pitch_rotated' (four rotated pitch vertices)
+        """
+
+        folder_path, filename_pitch = os.path.split(os.path.abspath(pitch_path))
+        cache_path = os.path.join(folder_path, LiveTracking.transform_name)
+        pitch_hash = TrackCache.file_hash(pitch_path)
+
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path) as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                cached = {}
+
+            if cached.get("pitch_hash") == pitch_hash and cached.get("translate") == translate:
+                print (f"[OK] Pitch transform loaded from {cache_path} \n")
+                return LiveTracking.transform_from_json(cached)
+
+        pitch = PitchRotation.check_pitch_columns(PitchRotation.read_pitch(folder_path, filename_pitch))
+
+        zone, hemisphere = PitchRotation.pitch_projection(pitch)
+        origin, the_other, third_vex, fourth_vex = PitchRotation.pitch_pivot(PitchRotation.coordinates_to_field(pitch, zone, hemisphere))
+        rotation_matrix = PitchRotation.rotation_matrix(origin, the_other)
+        pitch_origin = origin if translate else None
+
+        transform = {"zone": zone,
+                     "hemisphere": hemisphere,
+                     "rotation_matrix": np.asarray(rotation_matrix, dtype = float),
+                     "origin": None if pitch_origin is None else np.asarray(pitch_origin, dtype = float),
+                     "pitch_rotated": PitchRotation.calibrate_coordinates(rotation_matrix, [origin, the_other, third_vex, fourth_vex], pitch_origin)}
+
+        with open(cache_path, "w") as f:
+            json.dump({"pitch_hash": pitch_hash,
+                       "translate": translate,
+                       "zone": transform["zone"],
+                       "hemisphere": transform["hemisphere"],
+                       "rotation_matrix": transform["rotation_matrix"].tolist(),
+                       "origin": None if transform["origin"] is None else transform["origin"].tolist(),
+                       "pitch_rotated": transform["pitch_rotated"].tolist()}, f, indent = 2)
+
+        print (f"[OK] Pitch transform saved to {cache_path} \n")
+
+        return transform
+
+
+    def transform_from_json(cached):
+
+        return {"zone": cached["zone"],
+                "hemisphere": cached["hemisphere"],
+                "rotation_matrix": np.array(cached["rotation_matrix"], dtype = float),
+                "origin": None if cached["origin"] is None else np.array(cached["origin"], dtype = float),
+                "pitch_rotated": np.array(cached["pitch_rotated"], dtype = float)}
+
+
+    ## state of a live session
+    def start(transform, players, time_format = "Unix", rate = 10, order = 2, cutoff = 2, max_delay = 1.0, max_gap = 1.0):
+
+        """
+        Creates the state of a live session; pass it to LiveTracking.push with every new batch.
+
+        Parameters:
+        - transform: dict from LiveTracking.pitch_transform
+        - players: player names (the columns of the output are '{player}_x', '{player}_y')
+        - time_format: "Unix" or "datetime-time"
+        - rate: sampling rate of the output timeline in Hz
+        - order, cutoff: causal Butterworth low-pass filter (order, cutoff in Hz); cutoff None disables smoothing
+        - max_delay: seconds to wait for late players before a timeline point is output without them
+        - max_gap: longest gap (seconds) filled by interpolation, as in Resampling.resample
+
+        Returns:
+        - dict: session state (updated in place by LiveTracking.push)
+        """
+
+        columns = [f"{player}_{axis}" for player in players for axis in ("x", "y")]
+
+        sos = None if cutoff is None else signal.butter(order, cutoff / (0.5 * rate), btype = 'low', analog = False, output = 'sos')
+
+        return {"transform": transform,
+                "players": list(players),
+                "columns": columns,
+                "time_format": time_format,
+                "rate": rate,
+                "max_delay_ms": max_delay * 1000,
+                "max_gap_ms": None if max_gap is None else max_gap * 1000,
+                "start_ms": None,
+                "next_index": 0,
+                "samples": {player: np.empty((0, 3)) for player in players}, # rows of (ms, X, Y)
+                "sos": sos,
+                "zi": None if sos is None else np.zeros((len(sos), 2, len(columns))),
+                "primed": np.zeros(len(columns), dtype = bool)}
+
+
+    ## add a batch of samples of one player and output the completed timeline points
+    def push(state, player, batch):
+
+        """
+        Projects, rotates, resamples and smooths a new batch of samples of one player.
+
+        Parameters:
+        - state: dict from LiveTracking.start
+        - player: player name (as given to LiveTracking.start)
+        - batch: pd.DataFrame with 'Timestamp', 'Latitude', 'Longitude' (ascending timestamps)
+
+        Returns:
+        - pd.DataFrame: new timeline points ('Timestamp' [ms], 'Start [s]', '{player}_x', '{player}_y', ...),
+          possibly empty while waiting for other players
+        """
+
+        LiveTracking.add(state, player, batch)
+
+        return LiveTracking.emit(state)
+
+
+    ## project and store a batch of samples of one player
+    def add(state, player, batch):
+
+        if player not in state["samples"]:
+            raise ValueError(f"Unknown player '{player}'; players of this session: {state['players']}")
+
+        if len(batch):
+            transform = state["transform"]
+
+            t = Resampling.to_milliseconds(PositionalData.normalise_timestamps(batch, state["time_format"])['Timestamp'], state["time_format"])
+
+            ## map projection with the pitch zone, then rotation (and translation) of the pitch
+            xy = MapProjection.to_field_xy(batch['Latitude'].to_numpy(dtype = float), batch['Longitude'].to_numpy(dtype = float),
+                                           transform["zone"], transform["hemisphere"])
+            xy = PitchRotation.calibrate_coordinates(transform["rotation_matrix"], xy, transform["origin"])
+
+            new = np.column_stack((t, xy))
+            new = new[~np.isnan(new).any(axis = 1)]
+
+            ## keep samples in time order; late samples before the last one are dropped
+            samples = state["samples"][player]
+            if len(samples):
+                new = new[new[:, 0] > samples[-1, 0]]
+
+            state["samples"][player] = np.vstack((samples, new))
+
+
+    ## timeline points that all players have reached (or waited max_delay for)
+    def emit(state):
+
+        last = [samples[-1, 0] for samples in state["samples"].values() if len(samples)]
+
+        if not last:
+            return pd.DataFrame(columns = ["Timestamp", "Start [s]"] + state["columns"])
+
+        if state["start_ms"] is None:
+            state["start_ms"] = min(samples[0, 0] for samples in state["samples"].values() if len(samples))
+
+        ## all players have data up to 'ready', unless a player is late by more than max_delay
+        ready = max(min(last) if len(last) == len(state["samples"]) else -np.inf, max(last) - state["max_delay_ms"])
+
+        rate = state["rate"]
+        start_ms = state["start_ms"]
+        end_index = int(np.floor((ready - start_ms) * rate / 1000))
+        steps = np.arange(state["next_index"], end_index + 1)
+
+        if not len(steps):
+            return pd.DataFrame(columns = ["Timestamp", "Start [s]"] + state["columns"])
+
+        grid = start_ms + np.round(steps * 1000 / rate)
+        values = np.full((len(grid), len(state["columns"])), np.nan)
+
+        for i, player in enumerate(state["players"]):
+            samples = state["samples"][player]
+
+            if not len(samples):
+                continue
+
+            ## linear interpolation in time between the neighbouring samples
+            t = samples[:, 0]
+            values[:, 2 * i] = np.interp(grid, t, samples[:, 1], left = np.nan, right = np.nan)
+            values[:, 2 * i + 1] = np.interp(grid, t, samples[:, 2], left = np.nan, right = np.nan)
+
+            ## gaps longer than max_gap stay empty
+            if state["max_gap_ms"] is not None and len(t) > 1:
+                right = np.clip(np.searchsorted(t, grid), 1, len(t) - 1)
+                too_long = (t[right] - t[right - 1] > state["max_gap_ms"]) & (grid != t[right - 1]) & (grid != t[right])
+                values[too_long, 2 * i:2 * i + 2] = np.nan
+
+            ## keep the last sample before the next timeline point for the next batch
+            keep = max(np.searchsorted(t, grid[-1], side = "right") - 1, 0)
+            state["samples"][player] = samples[keep:]
+
+        state["next_index"] = end_index + 1
+
+        if state["sos"] is not None:
+            values = LiveTracking.causal_filter(state, values)
+
+        frames = pd.DataFrame(values, columns = state["columns"])
+        frames.insert(0, "Timestamp", grid.astype(np.int64))
+        frames.insert(1, "Start [s]", steps / rate)
+
+        return frames
+
+
+    ## causal low-pass filter keeping its state between batches
+    def causal_filter(state, values):
+
+        """
+        Filters new timeline points with sosfilt, carrying the filter state (zi) over from the
+        previous batch. A column's state is (re)initialised to the steady state of its first
+        value after a gap, so gaps do not disturb the filter.
+        """
+
+        sos, zi, primed = state["sos"], state["zi"], state["primed"]
+
+        smoothed = np.full_like(values, np.nan)
+        valid = ~np.isnan(values)
+
+        ## columns without gaps in this batch and with a running filter: one call for all
+        running = valid.all(axis = 0) & primed
+        if running.any():
+            smoothed[:, running], zi[:, :, running] = signal.sosfilt(sos, values[:, running], axis = 0, zi = zi[:, :, running])
+
+        for col in np.flatnonzero(~running):
+
+            edges = np.diff(np.pad(valid[:, col], 1).astype(np.int8))
+            for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+
+                if start > 0 or not primed[col]:
+                    zi[:, :, col] = signal.sosfilt_zi(sos) * values[start, col]
+
+                smoothed[start:end, col], zi[:, :, col] = signal.sosfilt(sos, values[start:end, col], zi = zi[:, :, col])
+
+            primed[col] = valid[-1, col]
+
+        return smoothed
+
+
+    ## read the new complete lines of a growing csv file
+    def tail_csv(path, cursor = None):
+
+        """
+        Reads the rows appended to a positional data file since the last call.
+
+        Parameters:
+        - path: positional data file (.csv) being written by the receiver
+        - cursor: dict returned by the previous call (None for the first call)
+
+        Returns:
+        - pd.DataFrame with 'Timestamp', 'Latitude', 'Longitude' (empty if nothing new)
+        - dict: cursor for the next call
+        """
+
+        if cursor is None or os.path.getsize(path) < cursor["offset"]: # new or restarted file
+            cursor = {"offset": 0, "names": None, "renaming": None}
+
+        with open(path, "rb") as f:
+            f.seek(cursor["offset"])
+            data = f.read()
+
+        ## complete lines only; a partly written last line is read next time
+        end = data.rfind(b"\n") + 1
+
+        if cursor["names"] is None:
+            if end == 0:
+                return pd.DataFrame(columns = ['Timestamp', 'Latitude', 'Longitude']), cursor
+
+            names = pd.read_csv(io.BytesIO(data[:end]), index_col = False, nrows = 0).columns.to_list()
+            report, found_columns = PositionalData.check_player_columns(os.path.basename(path), names)
+
+            if any("Error:" in str(v) for v in report.values()):
+                raise ValueError(f"{path}: " + "; ".join(v for v in report.values() if "Error:" in str(v)))
+
+            cursor["names"] = names
+            cursor["renaming"] = {found_columns.get(col, col): col for col in ['Timestamp', 'Latitude', 'Longitude']}
+            header_end = data.find(b"\n") + 1
+            cursor["offset"] += header_end
+            data, end = data[header_end:], end - header_end
+
+        cursor["offset"] += end
+
+        if end == 0:
+            return pd.DataFrame(columns = ['Timestamp', 'Latitude', 'Longitude']), cursor
+
+        batch = pd.read_csv(io.BytesIO(data[:end]), header = None, names = cursor["names"], index_col = False,
+                            usecols = list(cursor["renaming"]))
+
+        return batch.rename(columns = cursor["renaming"])[['Timestamp', 'Latitude', 'Longitude']], cursor
+
+
+    ## read samples sent to a local socket
+    def socket_batches(host = "127.0.0.1", port = 5555, timeout = 1.0):
+
+        """
+        Receives samples over TCP as lines of 'player,Timestamp,Latitude,Longitude' (one sample per line).
+
+        Yields:
+        - dict: mapping of player name to pd.DataFrame ('Timestamp', 'Latitude', 'Longitude') of the
+          lines received since the previous batch (empty dict if nothing arrived within timeout)
+        """
+
+        with socket.create_server((host, port)) as server:
+            print (f"[OK] Waiting for a sender on {host}:{port} \n")
+            connection, _ = server.accept()
+
+            with connection:
+                connection.settimeout(timeout)
+                pending = b""
+
+                while True:
+                    try:
+                        data = connection.recv(65536)
+                    except socket.timeout:
+                        yield {}
+                        continue
+
+                    if not data: # sender closed the connection
+                        return
+
+                    pending += data
+                    end = pending.rfind(b"\n") + 1
+                    lines, pending = pending[:end], pending[end:]
+
+                    if not lines:
+                        continue
+
+                    batch = pd.read_csv(io.BytesIO(lines), header = None, names = ["player", "Timestamp", "Latitude", "Longitude"],
+                                        dtype = {"player": str})
+
+                    yield {player: rows[['Timestamp', 'Latitude', 'Longitude']] for player, rows in batch.groupby("player", sort = False)}
+
+
+    ## live session tailing the positional data files of a folder (or a socket)
+    def run(position_dir, pitch_path, output_path = None, time_format = "Unix", rate = 10, order = 2, cutoff = 2,
+            max_delay = 1.0, max_gap = 1.0, poll_interval = 0.1, idle_timeout = None, port = None):
+
+        """
+        Follows positional data as it is written and appends the smoothed timeline to output_path.
+
+        Player files are named as for file_1_main_analysis.py (player name after the first '_').
+        With port, samples are received over a local socket instead (see LiveTracking.socket_batches)
+        and the player names are those of the files in position_dir.
+
+        Parameters:
+        - position_dir: folder of the growing positional data files (.csv)
+        - pitch_path: pitch file
+        - output_path: output .csv, default team_positions_live.csv next to position_dir
+        - idle_timeout: stop after this many seconds without new samples (None runs until interrupted)
+        - other parameters: see LiveTracking.start
+
+        Returns:
+        - dict: session state
+        """
+
+        if output_path is None:
+            output_path = os.path.join(Path(position_dir).resolve().parent, "team_positions_live.csv")
+
+        files = sorted(f for f in os.listdir(position_dir) if f.endswith('.csv'))
+        players = {file: file.split(".")[0].split("_")[1] for file in files}
+
+        transform = LiveTracking.pitch_transform(pitch_path)
+        state = LiveTracking.start(transform, list(players.values()), time_format, rate, order, cutoff, max_delay, max_gap)
+
+        sources = LiveTracking.socket_batches(port = port) if port is not None else None
+        cursors = {file: None for file in files}
+
+        header = True
+        last_data = time.perf_counter()
+        latencies = []
+
+        print (f"[OK] Live session started for {len(players)} players, output in {output_path} \n")
+
+        try:
+            while True:
+
+                if sources is None:
+                    batches = {}
+                    for file in files:
+                        batch, cursors[file] = LiveTracking.tail_csv(os.path.join(position_dir, file), cursors[file])
+                        batches[players[file]] = batch
+                else:
+                    batches = next(sources, None)
+                    if batches is None:
+                        break
+
+                batches = {player: batch for player, batch in batches.items() if len(batch) and player in state["samples"]}
+
+                if batches:
+                    ## add the batches of all players, then output the completed timeline points once
+                    start = time.perf_counter()
+                    for player, batch in batches.items():
+                        LiveTracking.add(state, player, batch)
+                    frames = LiveTracking.emit(state)
+                    latencies.append(time.perf_counter() - start)
+                    last_data = time.perf_counter()
+
+                    if len(frames):
+                        frames.to_csv(output_path, mode = "w" if header else "a", header = header, index = False)
+                        header = False
+
+                if idle_timeout is not None and time.perf_counter() - last_data > idle_timeout:
+                    break
+
+                if sources is None:
+                    time.sleep(poll_interval)
+
+        except KeyboardInterrupt:
+            pass
+
+        if latencies:
+            print (f"[OK] Live session stopped: {state['next_index']} timeline points, "
+                   f"median latency per batch {np.median(latencies) * 1000:.2f} ms (max {np.max(latencies) * 1000:.2f} ms) \n")
+
+        return state
+
+
+#%% run from the command line
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Process positional data live while it is being recorded.")
+    parser.add_argument("position_dir", help = "folder of the growing positional data files (.csv)")
+    parser.add_argument("pitch", help = "pitch file (.csv, .xls, .xlsx)")
+    parser.add_argument("--output", default = None, help = "output path (.csv)")
+    parser.add_argument("--time-format", default = "Unix", choices = ["Unix", "datetime-time"], help = "timestamp format")
+    parser.add_argument("--rate", type = float, default = 10, help = "output sampling rate (Hz)")
+    parser.add_argument("--cutoff", type = float, default = 2, help = "low-pass cutoff frequency (Hz)")
+    parser.add_argument("--max-delay", type = float, default = 1.0, help = "seconds to wait for late players")
+    parser.add_argument("--idle-timeout", type = float, default = None, help = "stop after this many seconds without data")
+    parser.add_argument("--port", type = int, default = None, help = "receive samples on this local TCP port instead")
+    args = parser.parse_args()
+
+    LiveTracking.run(args.position_dir, args.pitch, args.output, args.time_format, args.rate, cutoff = args.cutoff,
+                     max_delay = args.max_delay, idle_timeout = args.idle_timeout, port = args.port)
@@ -0,0 +1,292 @@
+from file_2_preprocessing import FileDetection
+from file_2_preprocessing import SessionDetails
+from file_2_preprocessing import PitchRotation
+from file_2_preprocessing import PositionalData
+from file_2_preprocessing import Resampling
+from file_2_preprocessing import Smoothing
+from file_2_preprocessing import VisualInspection
+from file_4_cache import TrackCache
+from file_10_instrumentation import Instrumentation
+from file_11_team_metrics import TeamMetrics
+from file_13_heatmaps import Heatmaps
+from file_14_dominant_regions import DominantRegions
+from file_15_kinematics import Kinematics
+from file_16_team_tracks import TeamTracks
+
+import os
+import argparse
+import pandas as pd
+
+from pathlib import Path
+
+#%%
+class Pipeline:
+
+    # Options of Pipeline.run_pipeline (file_1_main_analysis.py sets the common ones in its options cell)
+    default_options = {
+        "translate": False,           # move the pitch origin (bottom-left corner) to (0, 0)
+        "window_tolerance": None,     # session window lookup, see PositionalData.session_window
+        "window_policy": None,
+        "cache_dir": "track_cache",   # relative to the session folder; None disables the cache
+        "cache_size_mb": 500,
+        "stream_chunksize": None,     # read files in chunks of this many rows (None loads whole files)
+        "player_workers": 1,          # processes reading players in parallel
+        "rate": 10,                   # sampling rate of the new timeline (Hz)
+        "max_gap": 1.0,               # longest gap filled by interpolation (s), None fills all gaps
+        "smoothing": "savitzky_golay", # "savitzky_golay", "butterworth" or None
+        "window_length": 7,           # Savitzky-Golay
+        "polyorder": 1,
+        "order": 4,                   # Butterworth
+        "cutoff": 2,
+        "output_csv": "team_positions_10Hz.csv", # relative to the session folder; None skips saving
+        "min_hull_players": 3,        # surface area of frames with fewer players is left empty
+        "heatmaps": "heatmaps.npz",   # binned positions per player, relative to the session folder; None skips them
+        "heatmap_cell": 1.0,          # heatmap cell size (m)
+        "heatmap_margin": 2.0,        # heatmap space around the pitch lines (m)
+        "dominant_regions": None,     # Voronoi area per player on every n-th frame (e.g. 10: once per second at 10 Hz); None skips them
+        "dominant_workers": 1,        # processes computing dominant regions in parallel
+        "kinematics_window": 7,       # Savitzky-Golay derivatives for speed and acceleration
+        "kinematics_polyorder": 2,
+        "zones_csv": "speed_zones.csv", # time in speed zones and distance per player, relative to the session folder; None skips saving
+        "metrics_csv": None,          # team metrics per frame, relative to the session folder; None skips saving
+        "plots": False,               # save the pitch figures (matplotlib is only loaded if True)
+        "sec": None,                  # time point of the player figure (with plots)
+        "run_report": "run_report.json", # per-stage timings, relative to the session folder; None disables
+        "trace_memory": False,        # peak memory per stage in the run report (tracemalloc, slower)
+        "profile": None,              # stage names to run under cProfile, or True for all stages
+    }
+
+
+    ## run the whole pipeline for one session folder
+    def run_pipeline(folder_path, options = None):
+
+        """
+        Processes one session folder (used by file_1_main_analysis.py, file_5_batch_analysis.py and the command line).
+
+        Parameters:
+        - folder_path: folder containing the positional data folder, the pitch file and the session file
+        - options: dict overriding Pipeline.default_options
+
+        Returns:
+        - dict with 'match_info', 'time_format', 'pitch', 'pitch_projected' (pitch corners after map projection),
+          'pitch_rotated', 'rotation_matrix', 'origin',
+          'start_ts', 'end_ts', 'ssg' (merged raw tracks), 'dum_timeline', 'data_loss',
+          'team_data' (resampled and smoothed, as team_positions_10Hz.csv), 'interpolated', 'output_path',
+          'team_tracks' (resampled and smoothed (frames, players, 2) array with timestamps, players and teams, see TeamTracks;
+          smoothing and the analysis stages run on it),
+          'team_metrics' (centroid, stretch index, spread, length, width and surface area per team and frame),
+          'heatmap' (binned positions, None without the heatmaps option), 'dominant_regions' ('areas', 'frames' and
+          'players' from DominantRegions.dominant_regions and 'team_areas', None without the option), 'kinematics' (speed, acceleration
+          and distance per player and frame), 'speed_zones' (time in speed zones and distance per player)
+          and 'run_report' (per-stage wall time, CPU time, peak memory and row counts, also saved as run_report.json)
+        """
+
+        unknown = set(options or {}) - set(Pipeline.default_options)
+        if unknown:
+            raise ValueError(f"Unknown pipeline option(s): {sorted(unknown)}")
+
+        options = {**Pipeline.default_options, **(options or {})}
+        folder_path = Path(folder_path).resolve()
+
+        report = None
+        if options["run_report"] is not None:
+            report = Instrumentation.start_run(folder_path, options["trace_memory"], options["profile"],
+                                               profile_dir = os.path.join(folder_path, "profiles") if options["profile"] else None)
+
+        ## identify files, read session details and pitch
+        with Instrumentation.stage(report, "detect files"):
+            filename_session, filename_pitch, foldername_position_data = FileDetection.detect_file_folder_name(folder_path)
+
+        with Instrumentation.stage(report, "read session") as record:
+            match_info = SessionDetails.read_match_data(folder_path, filename_session)
+            time_format = SessionDetails.check_time_columns(match_info)
+            record["rows"] = len(match_info)
+
+        with Instrumentation.stage(report, "read pitch") as record:
+            pitch = PitchRotation.check_pitch_columns(PitchRotation.read_pitch(folder_path, filename_pitch))
+            record["rows"] = len(pitch)
+
+        ## map projection and rotation of the pitch
+        with Instrumentation.stage(report, "pitch projection") as record:
+            zone, hemisphere = PitchRotation.pitch_projection(pitch)
+            ini_xyco_pitch = PitchRotation.coordinates_to_field(pitch, zone, hemisphere)
+
+            origin, the_other, third_vex, fourth_vex = PitchRotation.pitch_pivot(ini_xyco_pitch)
+            rotation_matrix = PitchRotation.rotation_matrix(origin, the_other)
+            pitch_origin = origin if options["translate"] else None
+
+            pitch_rotated = pd.DataFrame(PitchRotation.calibrate_coordinates(rotation_matrix,
+                                                                             [origin, the_other, third_vex, fourth_vex],
+                                                                             pitch_origin),
+                                         columns = ['X', 'Y'])
+            record["rows"] = len(pitch_rotated)
+
+        if options["plots"]:
+            with Instrumentation.stage(report, "pitch plots"):
+                PitchRotation.plot_pitch(ini_xyco_pitch, fig_name = "Pitch After Map Projection")
+                PitchRotation.plot_pitch(pitch_rotated, fig_name = "Pitch After Rotation")
+
+        ## session window
+        position_data_dir = os.path.join(folder_path, foldername_position_data)
+        playernum = len([f for f in os.listdir(position_data_dir) if f.endswith('.csv')])
+
+        start_ts, end_ts = PositionalData.identify_start_end_timestamp(match_info, time_format, playernum)
+
+        ## player tracks (cached, read, projected and calibrated)
+        cache_dir = None if options["cache_dir"] is None else os.path.join(folder_path, options["cache_dir"])
+
+        with Instrumentation.stage(report, "load cache") as record:
+            cache_keys = TrackCache.track_keys(position_data_dir, os.path.join(folder_path, filename_pitch), time_format,
+                                               start_ts, end_ts, pitch_origin,
+                                               options = (options["window_tolerance"], options["window_policy"]),
+                                               zone = zone, hemisphere = hemisphere)
+            tracks = TrackCache.load_tracks(cache_dir, cache_keys)
+            record["rows"] = sum(len(track) for track in tracks.values() if track is not None)
+
+        with Instrumentation.stage(report, "process players") as record:
+            processed = PositionalData.process_players(position_data_dir, [f for f, track in tracks.items() if track is None],
+                                                       time_format, start_ts, end_ts, rotation_matrix, pitch_origin,
+                                                       options["window_tolerance"], options["window_policy"], zone, hemisphere,
+                                                       chunksize = options["stream_chunksize"], workers = options["player_workers"])
+            tracks.update(processed)
+            record["rows"] = sum(len(track) for track in processed.values())
+
+        with Instrumentation.stage(report, "save cache"):
+            TrackCache.save_tracks(cache_dir, cache_keys, tracks, options["cache_size_mb"])
+
+        ## team data on the new timeline
+        with Instrumentation.stage(report, "team tracking") as record:
+            ssg = PositionalData.team_tracking(tracks)
+            record["rows"] = len(ssg)
+
+        with Instrumentation.stage(report, "new timeline") as record:
+            dum_timeline, ssg = PositionalData.create_new_timeline(time_format, ssg, start_ts, end_ts, options["rate"])
+            record["rows"] = len(dum_timeline)
+
+        ## team labels from the session file (all players form one team without a team column)
+        teams = TeamMetrics.teams_from_session(match_info, TeamMetrics.positions(ssg)[1])
+
+        with Instrumentation.stage(report, "data loss") as record:
+            data_loss = PositionalData.check_data_loss(ssg, dum_timeline, teams)
+            PositionalData.print_data_loss(data_loss)
+            record["rows"] = data_loss["expected_samples"]
+
+        with Instrumentation.stage(report, "resample") as record:
+            team_data, interpolated = Resampling.resample(ssg, dum_timeline, options["max_gap"])
+            record["rows"] = len(team_data)
+
+        ## resampled team data as one (frames, players, 2) array for smoothing and the analysis stages
+        with Instrumentation.stage(report, "team tracks") as record:
+            team_tracks = TeamTracks.from_frame(team_data, teams)
+            record["rows"] = len(team_tracks["xy"])
+
+        ## smoothing
+        with Instrumentation.stage(report, "smoothing") as record:
+            if options["smoothing"] == "savitzky_golay":
+                team_tracks = Smoothing.savitzky_golay(team_tracks, window_length = options["window_length"], polyorder = options["polyorder"])
+            elif options["smoothing"] == "butterworth":
+                team_tracks = Smoothing.butterworth_low_path_filter(team_tracks, fs = options["rate"], order = options["order"], cutoff = options["cutoff"])
+            elif options["smoothing"] is not None:
+                raise ValueError(f"Unsupported smoothing: {options['smoothing']} (use 'savitzky_golay', 'butterworth' or None)")
+
+            # wide DataFrame in the original column order, for the saved csv, the plots and result["team_data"]
+            team_data = TeamTracks.to_frame(team_tracks)
+            record["rows"] = len(team_data)
+
+        ## team metrics
+        with Instrumentation.stage(report, "team metrics") as record:
+            team_metrics = TeamMetrics.team_metrics(team_tracks)
+            record["rows"] = len(team_metrics)
+
+        with Instrumentation.stage(report, "surface area") as record:
+            team_metrics = team_metrics.join(TeamMetrics.surface_area(team_tracks, min_players = options["min_hull_players"]))
+            record["rows"] = len(team_metrics)
+
+        ## kinematics
+        with Instrumentation.stage(report, "kinematics") as record:
+            kinematics = Kinematics.kinematics(team_tracks, options["rate"], options["kinematics_window"], options["kinematics_polyorder"])
+            speed_zones = Kinematics.zone_summary(kinematics, options["rate"])
+            record["rows"] = len(kinematics)
+
+        if options["zones_csv"] is not None:
+            speed_zones.to_csv(os.path.join(folder_path, options["zones_csv"]))
+
+        heatmap = None
+        if options["heatmaps"] is not None:
+            with Instrumentation.stage(report, "heatmaps") as record:
+                heatmap = Heatmaps.new_heatmap(pitch_rotated, options["heatmap_cell"], options["heatmap_margin"])
+                Heatmaps.accumulate(heatmap, team_tracks, pitch_rotated)
+                Heatmaps.save(heatmap, os.path.join(folder_path, options["heatmaps"]))
+                record["rows"] = len(heatmap["players"])
+
+        dominant_regions = None
+        if options["dominant_regions"] is not None:
+            with Instrumentation.stage(report, "dominant regions") as record:
+                areas, frames, players = DominantRegions.dominant_regions(team_tracks, pitch_rotated, stride = options["dominant_regions"],
+                                                                          workers = options["dominant_workers"])
+                dominant_regions = {"areas": areas, "frames": frames, "players": players,
+                                    "team_areas": DominantRegions.team_areas(areas, players, TeamTracks.team_labels(team_tracks))}
+                record["rows"] = len(frames)
+
+        ## save processed data
+        output_path = None if options["output_csv"] is None else os.path.join(folder_path, options["output_csv"])
+
+        if output_path is not None:
+            with Instrumentation.stage(report, "save csv") as record:
+                team_data.to_csv(output_path, index = False)
+                record["rows"] = len(team_data)
+            print (f"[OK] Team positional data saved to {output_path} \n")
+
+        if options["metrics_csv"] is not None:
+            team_metrics.to_csv(os.path.join(folder_path, options["metrics_csv"]), index = False)
+            print (f"[OK] Team metrics saved to {os.path.join(folder_path, options['metrics_csv'])} \n")
+
+        if options["plots"] and options["sec"] is not None:
+            with Instrumentation.stage(report, "player plot"):
+                VisualInspection.plot_pitch_players(pitch_rotated, team_data, options["sec"])
+
+        if report is not None:
+            Instrumentation.write_report(report, os.path.join(folder_path, options["run_report"]))
+
+        return {"match_info": match_info,
+                "time_format": time_format,
+                "pitch": pitch,
+                "pitch_projected": ini_xyco_pitch,
+                "pitch_rotated": pitch_rotated,
+                "rotation_matrix": rotation_matrix,
+                "origin": pitch_origin,
+                "start_ts": start_ts,
+                "end_ts": end_ts,
+                "ssg": ssg,
+                "dum_timeline": dum_timeline,
+                "data_loss": data_loss,
+                "team_data": team_data,
+                "interpolated": interpolated,
+                "output_path": output_path,
+                "team_tracks": team_tracks,
+                "team_metrics": team_metrics,
+                "heatmap": heatmap,
+                "dominant_regions": dominant_regions,
+                "kinematics": kinematics,
+                "speed_zones": speed_zones,
+                "run_report": report}
+
+
+#%% run from the command line
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Process one session folder (headless unless --plots is given).")
+    parser.add_argument("folder", help = "session folder (positional data folder, pitch file, session file)")
+    parser.add_argument("--plots", action = "store_true", help = "save the pitch figures")
+    parser.add_argument("--workers", type = int, default = 1, help = "processes reading players in parallel")
+    parser.add_argument("--no-cache", action = "store_true", help = "do not use the track cache")
+    parser.add_argument("--trace-memory", action = "store_true", help = "record peak memory per stage")
+    parser.add_argument("--profile", nargs = "*", default = None, help = "run these stages (all if none given) under cProfile")
+    args = parser.parse_args()
+
+    options = {"plots": args.plots, "player_workers": args.workers, "trace_memory": args.trace_memory,
+               "profile": (args.profile or True) if args.profile is not None else None}
+    if args.no_cache:
+        options["cache_dir"] = None
+
+    Pipeline.run_pipeline(args.folder, options)
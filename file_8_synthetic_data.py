@@ -0,0 +1,211 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+#%%
+class SyntheticSession:
+
+    # Names follow the detection rules of FileDetection.detect_file_folder_name
+    position_folder = "Synthetic_Positional_data"
+    pitch_name = "Synthetic_Pitch.csv"
+    session_name = "Synthetic_SessionDetails.csv"
+
+    # Metres per degree of latitude (spherical approximation, enough for synthetic data)
+    metres_per_degree = 111320.0
+
+
+    ## player movement on the pitch (in metres, pitch axes)
+    def player_paths(n_players, n_samples, rate, length, width, rng, max_speed = 7.0):
+
+        """
+        Random, smooth running paths inside the pitch for all players at once.
+
+        Velocities follow a mean-reverting random process (typical speeds of a few m/s,
+        capped at max_speed); positions are reflected at the pitch lines.
+
+        Returns:
+        - x, y: np.ndarray (n_samples, n_players) in metres from the pitch corner
+        """
+
+        import scipy.signal as signal
+
+        dt = 1 / rate
+
+        # velocity: mean-reverting random walk, about 1 s memory
+        theta = 1.0
+        noise = rng.normal(0, 2.0 * np.sqrt(2 * theta * dt), size = (n_samples, n_players, 2))
+        decay = np.exp(-theta * dt)
+
+        noise[0] = rng.normal(0, 2.0, size = (n_players, 2))
+        velocity = signal.lfilter([1], [1, -decay], noise, axis = 0) # v[i] = decay * v[i - 1] + noise[i]
+
+        speed = np.linalg.norm(velocity, axis = 2, keepdims = True)
+        velocity *= np.minimum(1, max_speed / np.maximum(speed, 1e-9))
+
+        start = rng.uniform([0, 0], [length, width], size = (n_players, 2))
+        position = start + np.cumsum(velocity * dt, axis = 0)
+
+        # reflect at the pitch lines
+        size = np.array([length, width])
+        position = np.abs((position + size) % (2 * size) - size)
+
+        return position[:, :, 0], position[:, :, 1]
+
+
+    ## rows removed to imitate signal loss
+    def dropout_mask(n_samples, n_players, rng, dropout = 0.05, dropout_length = 3, long_dropouts = 0, long_length = 60):
+
+        """
+        Boolean mask (n_samples, n_players), True where a sample is kept.
+
+        Parameters:
+        - dropout: fraction of samples lost in short dropouts
+        - dropout_length: mean length of a short dropout (samples, geometric distribution)
+        - long_dropouts: number of long dropouts per player (e.g. a unit switched off)
+        - long_length: length of each long dropout (seconds * rate, i.e. samples)
+        """
+
+        keep = np.ones((n_samples, n_players), dtype = bool)
+
+        # short dropouts: starts uniform in time, lengths geometric
+        n_runs = int(round(dropout * n_samples * n_players / max(dropout_length, 1)))
+        if n_runs:
+            starts = rng.integers(0, n_samples, size = n_runs)
+            players = rng.integers(0, n_players, size = n_runs)
+            lengths = rng.geometric(1 / max(dropout_length, 1), size = n_runs)
+
+            # mark every sample covered by a run: +1 at the start, -1 after the end, cumulative sum
+            change = np.zeros((n_samples + 1, n_players), dtype = np.int32)
+            np.add.at(change, (starts, players), 1)
+            np.add.at(change, (np.minimum(starts + lengths, n_samples), players), -1)
+            keep &= np.cumsum(change, axis = 0)[:-1] == 0
+
+        # long dropouts
+        for player in range(n_players):
+            for start in rng.integers(0, max(n_samples - long_length, 1), size = long_dropouts):
+                keep[start:start + long_length, player] = False
+
+        return keep
+
+
+    ## write a complete session folder
+    def generate(folder_path, players = 12, duration = 600, rate = 10, dropout = 0.05, dropout_length = 3,
+                 long_dropouts = 0, long_length = 6.0, time_format = "Unix", margin = 60, seed = 0,
+                 centre = (41.7264, -9.1236), length = 40, width = 30, angle = 30):
+
+        """
+        Writes a synthetic session in the layout of the example data (Catapult-style exports).
+
+        The folder gets a positional data folder with one csv per player ('Timestamp, Longitude, Latitude'),
+        a pitch file with the four corners and a session file with the teams (first half of the players 'A',
+        the rest 'B') and the split start/end times.
+
+        Parameters:
+        - folder_path: output folder (created if needed)
+        - players: number of players
+        - duration: session (split) duration in seconds
+        - rate: sampling rate of the exports in Hz
+        - dropout, dropout_length: fraction of samples lost and mean dropout length (samples)
+        - long_dropouts, long_length: long dropouts per player and their length (seconds)
+        - time_format: "Unix" (serial days, as the example data) or "datetime-time" ('HH:MM:SS.fff')
+        - margin: seconds recorded before and after the session
+        - seed: random seed (same seed, same data)
+        - centre: (latitude, longitude) of the pitch centre
+        - length, width: pitch size in metres
+        - angle: pitch orientation (degrees from east)
+
+        Returns:
+        - dict with the folder, file names and number of rows written
+        """
+
+        if time_format not in ("Unix", "datetime-time"):
+            raise ValueError(f"Unsupported time format: {time_format}")
+
+        rng = np.random.default_rng(seed)
+        os.makedirs(os.path.join(folder_path, SyntheticSession.position_folder), exist_ok = True)
+
+        ## pitch corners and local metres -> degrees conversion
+        lat0, lon0 = centre
+        rotation = np.deg2rad(angle)
+        axis_length = np.array([np.cos(rotation), np.sin(rotation)])
+        axis_width = np.array([-np.sin(rotation), np.cos(rotation)])
+        scale = np.array([SyntheticSession.metres_per_degree * np.cos(np.deg2rad(lat0)), SyntheticSession.metres_per_degree])
+
+        def to_degrees(x, y):
+            # pitch axes (from the corner) -> east/north metres from the centre -> lon/lat
+            east_north = (x[..., None] - length / 2) * axis_length + (y[..., None] - width / 2) * axis_width
+            return lon0 + east_north[..., 0] / scale[0], lat0 + east_north[..., 1] / scale[1]
+
+        corner_x = np.array([0.0, length, length, 0.0])
+        corner_y = np.array([0.0, 0.0, width, width])
+        corner_lon, corner_lat = to_degrees(corner_x, corner_y)
+        pd.DataFrame({"longitude": corner_lon, "latitude": corner_lat}).to_csv(os.path.join(folder_path, SyntheticSession.pitch_name),
+                                                                             index = False, float_format = "%.9f")
+
+        ## timestamps: recording starts margin seconds before the session
+        n_samples = int(round((duration + 2 * margin) * rate)) + 1
+        day = 44519 + 0.7 # serial day and time of day of the recording start
+        seconds = np.arange(n_samples) / rate
+
+        x, y = SyntheticSession.player_paths(players, n_samples, rate, length, width, rng)
+        lon, lat = to_degrees(x, y)
+
+        keep = SyntheticSession.dropout_mask(n_samples, players, rng, dropout, dropout_length, long_dropouts, int(long_length * rate))
+
+        # split times are set on recorded samples: every player has the samples at the session start and end
+        keep[[int(round(margin * rate)), int(round((margin + duration) * rate))], :] = True
+
+        if time_format == "Unix":
+            timestamps = day + seconds / 86400
+            session_start, session_end = day + margin / 86400, day + (margin + duration) / 86400
+        else:
+            timestamps = SyntheticSession.time_strings((day % 1) * 86400 + seconds)
+            session_start, session_end = SyntheticSession.time_strings((day % 1) * 86400 + np.array([margin, margin + duration]))
+
+        rows = 0
+        for player in range(players):
+            kept = keep[:, player]
+            export = pd.DataFrame({"Timestamp": timestamps[kept], " Longitude": lon[kept, player], " Latitude": lat[kept, player]})
+            export.to_csv(os.path.join(folder_path, SyntheticSession.position_folder, f"SYN_ID{player + 1}.csv"),
+                          index = False, float_format = "%.11f")
+            rows += int(kept.sum())
+
+        ## session details: one row per player with the team and the split start and end times
+        pd.DataFrame({"Date": int(day),
+                      "Number of team": ["A" if player < (players + 1) // 2 else "B" for player in range(players)],
+                      "Player Name": [f"ID_{player + 1}" for player in range(players)],
+                      "Split Start Time": session_start,
+                      "Split End Time": session_end,
+                      "Duration": duration}).to_csv(os.path.join(folder_path, SyntheticSession.session_name),
+                                                    index = False, float_format = "%.9f")
+
+        print (f"[OK] Synthetic session written to {folder_path}: {players} players, {duration} s at {rate} Hz, {rows} rows \n")
+
+        return {"folder": folder_path, "players": players, "duration": duration, "rate": rate, "rows": rows}
+
+
+    def time_strings(seconds):
+
+        # seconds since midnight -> 'HH:MM:SS.fff'
+        ms = np.round(np.asarray(seconds) * 1000).astype(np.int64)
+        return np.array([f"{m // 3600000:02d}:{m // 60000 % 60:02d}:{m // 1000 % 60:02d}.{m % 1000:03d}" for m in ms.tolist()])
+
+
+#%% run from the command line
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Write a synthetic session folder (positional data, pitch and session file).")
+    parser.add_argument("folder", help = "output folder")
+    parser.add_argument("--players", type = int, default = 12)
+    parser.add_argument("--duration", type = float, default = 600, help = "session duration (s)")
+    parser.add_argument("--rate", type = float, default = 10, help = "sampling rate (Hz)")
+    parser.add_argument("--dropout", type = float, default = 0.05, help = "fraction of samples lost")
+    parser.add_argument("--dropout-length", type = float, default = 3, help = "mean dropout length (samples)")
+    parser.add_argument("--long-dropouts", type = int, default = 0, help = "long dropouts per player")
+    parser.add_argument("--time-format", default = "Unix", choices = ["Unix", "datetime-time"])
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    SyntheticSession.generate(args.folder, args.players, args.duration, args.rate, args.dropout, args.dropout_length,
+                              args.long_dropouts, time_format = args.time_format, seed = args.seed)
@@ -0,0 +1,198 @@
+from file_2_preprocessing import SessionDetails
+from file_2_preprocessing import PitchRotation
+from file_2_preprocessing import PositionalData
+from file_2_preprocessing import Resampling
+from file_2_preprocessing import Smoothing
+from file_8_synthetic_data import SyntheticSession
+
+import io
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+import pandas as pd
+
+#%%
+class Benchmark:
+
+    # Stages timed in order; each takes and extends the dict of results of the previous stages
+    # (process_players is the pipeline's read path: reading, session window, projection and calibration)
+    stages = ["process_players", "team_tracking", "create_new_timeline",
+              "check_data_loss", "resample", "savitzky_golay", "butterworth"]
+
+
+    ## inputs shared by all stages: session window and pitch transform
+    def prepare(folder_path):
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            match_info = SessionDetails.read_match_data(folder_path, SyntheticSession.session_name)
+            time_format = SessionDetails.check_time_columns(match_info)
+
+            pitch = PitchRotation.check_pitch_columns(PitchRotation.read_pitch(folder_path, SyntheticSession.pitch_name))
+            zone, hemisphere = PitchRotation.pitch_projection(pitch)
+            origin, the_other, _, _ = PitchRotation.pitch_pivot(PitchRotation.coordinates_to_field(pitch, zone, hemisphere))
+
+        position_dir = os.path.join(folder_path, SyntheticSession.position_folder)
+        files = sorted(f for f in os.listdir(position_dir) if f.endswith('.csv'))
+        start_ts, end_ts = PositionalData.identify_start_end_timestamp(match_info, time_format, len(files))
+
+        return {"position_dir": position_dir, "files": files, "time_format": time_format,
+                "start_ts": start_ts, "end_ts": end_ts, "rm": PitchRotation.rotation_matrix(origin, the_other),
+                "zone": zone, "hemisphere": hemisphere}
+
+
+    ## one stage, on the results of the previous stages
+    def run_stage(stage, data, rate = 10):
+
+        """
+        Runs one pipeline stage and returns (output, number of output rows).
+        """
+
+        if stage == "process_players":
+            output = PositionalData.process_players(data["position_dir"], data["files"], data["time_format"],
+                                                    data["start_ts"], data["end_ts"], data["rm"],
+                                                    zone = data["zone"], hemisphere = data["hemisphere"])
+            return output, sum(len(track) for track in output.values())
+
+        if stage == "team_tracking":
+            output = PositionalData.team_tracking(data["process_players"])
+            return output, len(output)
+
+        if stage == "create_new_timeline":
+            output = PositionalData.create_new_timeline(data["time_format"], data["team_tracking"], data["start_ts"], data["end_ts"], rate)
+            return output, len(output[0])
+
+        if stage == "check_data_loss":
+            dum_timeline, ssg = data["create_new_timeline"]
+            output = PositionalData.check_data_loss(ssg, dum_timeline)
+            return output, output["expected_samples"]
+
+        if stage == "resample":
+            dum_timeline, ssg = data["create_new_timeline"]
+            output = Resampling.resample(ssg, dum_timeline, max_gap = 1.0)
+            return output, len(output[0])
+
+        if stage == "savitzky_golay":
+            output = Smoothing.savitzky_golay(data["resample"][0])
+            return output, len(output)
+
+        if stage == "butterworth":
+            output = Smoothing.butterworth_low_path_filter(data["resample"][0], fs = rate, order = 4, cutoff = 2)
+            return output, len(output)
+
+        raise ValueError(f"Unknown stage: {stage}")
+
+
+    ## time and memory of every stage for one synthetic session
+    def profile_session(folder_path, repeat = 3, rate = 10):
+
+        """
+        Times every stage (best of repeat runs, wall and CPU time) and measures its peak memory
+        (Python and numpy allocations traced with tracemalloc, in a separate run so tracing does
+        not distort the timings).
+
+        Returns:
+        - list of dicts, one per stage
+        """
+
+        data = Benchmark.prepare(folder_path)
+        records = []
+
+        for stage in Benchmark.stages:
+
+            wall, cpu = [], []
+            for _ in range(repeat):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start_wall, start_cpu = time.perf_counter(), time.process_time()
+                    output, rows = Benchmark.run_stage(stage, data, rate)
+                    wall.append(time.perf_counter() - start_wall)
+                    cpu.append(time.process_time() - start_cpu)
+
+            tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                Benchmark.run_stage(stage, data, rate)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            data[stage] = output
+            records.append({"stage": stage, "rows": rows, "wall [s]": min(wall), "cpu [s]": min(cpu), "peak memory [MB]": peak / 1024 / 1024})
+
+        return records
+
+
+    ## benchmark over a grid of session sizes
+    def run_benchmark(players = (6, 12, 22), durations = (600, 3600), rate = 10, dropout = 0.05, time_format = "Unix",
+                      repeat = 3, report_path = "benchmark_report.csv", baseline_path = None, threshold = 1.25):
+
+        """
+        Generates synthetic sessions for every combination of player count and duration and
+        profiles each pipeline stage on them.
+
+        Parameters:
+        - players, durations: grid of session sizes (number of players, session duration in seconds)
+        - rate, dropout, time_format: synthetic data settings (see SyntheticSession.generate)
+        - repeat: runs per stage for the timings (the fastest is kept)
+        - report_path: output report (.csv)
+        - baseline_path: earlier report to compare with; stages slower by more than threshold are flagged
+        - threshold: allowed ratio of wall time to the baseline
+
+        Returns:
+        - pd.DataFrame: one row per session size and stage
+        """
+
+        records = []
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for n_players in players:
+                for duration in durations:
+
+                    folder_path = os.path.join(tmp_dir, f"synthetic_{n_players}p_{duration}s")
+
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        SyntheticSession.generate(folder_path, n_players, duration, rate, dropout, time_format = time_format)
+
+                    for record in Benchmark.profile_session(folder_path, repeat, rate):
+                        records.append({"players": n_players, "duration [s]": duration, **record})
+                        print (f"{n_players:>4} players {duration:>6} s  {record['stage']:<20} {record['wall [s]']:>8.3f} s  {record['peak memory [MB]']:>8.1f} MB")
+
+        report = pd.DataFrame(records)
+
+        if baseline_path is not None:
+            baseline = pd.read_csv(baseline_path)
+            report = report.merge(baseline[["players", "duration [s]", "stage", "wall [s]"]].rename(columns = {"wall [s]": "baseline wall [s]"}),
+                                  on = ["players", "duration [s]", "stage"], how = "left")
+            report["ratio"] = report["wall [s]"] / report["baseline wall [s]"]
+            report["regression"] = report["ratio"] > threshold
+
+            regressions = report[report["regression"]]
+            if len(regressions):
+                print (f"\n{len(regressions)} stage(s) slower than {threshold:.2f}x the baseline:\n")
+                print (regressions[["players", "duration [s]", "stage", "wall [s]", "baseline wall [s]", "ratio"]].to_string(index = False))
+            else:
+                print (f"\n[OK] No stage slower than {threshold:.2f}x the baseline")
+
+        report.to_csv(report_path, index = False)
+        print (f"\nReport saved to {report_path} \n")
+
+        return report
+
+
+#%% run from the command line
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Time and memory-profile each pipeline stage on synthetic sessions.")
+    parser.add_argument("--players", type = int, nargs = "+", default = [6, 12, 22], help = "player counts")
+    parser.add_argument("--durations", type = int, nargs = "+", default = [600, 3600], help = "session durations (s)")
+    parser.add_argument("--rate", type = float, default = 10, help = "sampling rate (Hz)")
+    parser.add_argument("--dropout", type = float, default = 0.05, help = "fraction of samples lost")
+    parser.add_argument("--time-format", default = "Unix", choices = ["Unix", "datetime-time"])
+    parser.add_argument("--repeat", type = int, default = 3, help = "runs per stage (fastest kept)")
+    parser.add_argument("--report", default = "benchmark_report.csv", help = "report path (.csv)")
+    parser.add_argument("--baseline", default = None, help = "earlier report to compare with")
+    parser.add_argument("--threshold", type = float, default = 1.25, help = "allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    Benchmark.run_benchmark(args.players, args.durations, args.rate, args.dropout, args.time_format,
+                            args.repeat, args.report, args.baseline, args.threshold)